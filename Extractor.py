@@ -1,8 +1,22 @@
-from docx import Document
+if __name__ == "__main__":
+    # `python -m Extractor` is the command line: hand over before defining
+    # anything, so this file runs once (as the module cli imports) and the
+    # start-up time cli reports covers every import.
+    import sys
+    from cli import main
+    sys.exit(main())
+
+import html
+import io
 import re
 import os
-import pandas as pd
 from datetime import date
+from functools import cached_property
+from typing import NamedTuple
+
+from jsonld import JsonLdIndex
+from markers import MarkerSet, load_markers
+from textnorm import clean_heading, norm, remove_emojis
 # ------------------- Helpers -------------------
 DASH = "–"  # en-dash for year ranges
 
@@ -24,44 +38,16 @@ HEADER_LINE_RE = re.compile(
     """, re.I | re.X
 )
 
-def remove_emojis(text: str) -> str:
-    """Universal emoji remover."""
-    emoji_pattern = re.compile(
-        "[" 
-        "\U0001F600-\U0001F64F"  # emoticons
-        "\U0001F300-\U0001F5FF"  # symbols & pictographs
-        "\U0001F680-\U0001F6FF"  # transport & map
-        "\U0001F700-\U0001F77F"  # alchemical
-        "\U0001F780-\U0001F7FF"  # geometric
-        "\U0001F800-\U0001F8FF"  # arrows
-        "\U0001F900-\U0001F9FF"  # supplemental
-        "\U0001FA00-\U0001FAFF"  # chess, symbols
-        "\U00002600-\U000026FF"  # misc symbols
-        "\U00002700-\U000027BF"  # dingbats
-        "\U00002B00-\U00002BFF"  # arrows & symbols
-        "\U0001F1E0-\U0001F1FF"  # flags
-        "]+", flags=re.UNICODE
-    )
-    return emoji_pattern.sub(r'', text or "")
-def _remove_emojis(text: str) -> str:
-    emoji_pattern = re.compile(
-        "[" "\U0001F600-\U0001F64F"
-        "\U0001F300-\U0001F5FF"
-        "\U0001F680-\U0001F6FF"
-        "\U0001F1E0-\U0001F1FF"
-        "\U00002702-\U000027B0"
-        "\U000024C2-\U0001F251" "]+",
-        flags=re.UNICODE
-    )
-    return emoji_pattern.sub("", text)
+# Older helpers used a second, inconsistent emoji set; everything now shares textnorm's.
+_remove_emojis = remove_emojis
+_norm = norm
 
-
-def _norm(s: str) -> str:
-    s = remove_emojis(s or "")
-    return re.sub(r"\s+", " ", s.strip())
+TITLE_SPLIT_RE = re.compile(r"[:\-–]")
+YEAR_RANGE_RE = re.compile(r"20\d{2}\s*[\-–]\s*20\d{2}")
+NUMBERED_LINE_RE = re.compile(r"^\d+[\.\)]\s")
 
 def _inline_title(text: str) -> str:
-    m = re.split(r"[:\-–]", text, maxsplit=1)
+    m = TITLE_SPLIT_RE.split(text, maxsplit=1)
     if len(m) > 1:
         right = m[1].strip()
         if right and not HEADER_LINE_RE.match(right):
@@ -69,7 +55,7 @@ def _inline_title(text: str) -> str:
     return ""
 
 def _year_range_present(text: str) -> bool:
-    return bool(re.search(r"20\d{2}\s*[\-–]\s*20\d{2}", text))
+    return bool(YEAR_RANGE_RE.search(text))
 
 def _ensure_filename_start_and_year(title: str, filename: str) -> str:
     if not title.lower().startswith(filename.lower()):
@@ -77,22 +63,103 @@ def _ensure_filename_start_and_year(title: str, filename: str) -> str:
     if not _year_range_present(title):
         title = f"{title} {DASH}2024–2030"
     return _norm(title)
+# ------------------- Document Model -------------------
+class RunRecord(NamedTuple):
+    text: str
+    bold: bool
+    italic: bool
+
+class ParaRecord(NamedTuple):
+    text: str
+    style: str
+    runs: tuple
+
+class ParsedDocument:
+    """A .docx parsed once: paragraphs, styles, runs and table cell text.
+
+    `name` is the logical filename the filename-derived fields use; it
+    defaults to the basename of `path`, and is None for in-memory input
+    given without one.
+    """
+    __slots__ = ("path", "name", "paragraphs", "tables", "cache")
+
+    def __init__(self, path, paragraphs, tables, name=None):
+        self.path = path
+        self.name = name or (os.path.basename(path) if isinstance(path, str) else None)
+        self.paragraphs = paragraphs
+        self.tables = tables  # list of tables -> list of rows -> list of cell text
+        self.cache = {}  # derived per-document data (e.g. the JSON-LD index)
+
+# "docx" builds the document with python-docx; "stream" reads the XML with
+# iterparse (docx_stream.py) and stops as soon as the extractors stop reading.
+BACKENDS = ("docx", "stream")
+DEFAULT_BACKEND = os.environ.get("EXTRACTOR_BACKEND", "docx")
+
+def load_document(source, backend=None, name=None):
+    """Parse a .docx into a ParsedDocument (already parsed documents pass through).
+
+    `source` is a path, the file's bytes, or a binary file object; `name`
+    is the logical filename for the filename-derived fields (by default the
+    path's basename, or the file object's name).
+    """
+    if isinstance(source, ParsedDocument):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif isinstance(source, os.PathLike):
+        source = os.fspath(source)
+    if name is None and not isinstance(source, str):
+        name = getattr(source, "name", None)
+        name = os.path.basename(name) if isinstance(name, str) else None
+    backend = backend or DEFAULT_BACKEND
+    if backend == "stream":
+        from docx_stream import load_streamed
+        return load_streamed(source, name)
+    if backend != "docx":
+        raise ValueError(f"unknown backend {backend!r}, expected one of {BACKENDS}")
+    from docx import Document
+    from docx_stream import W, paragraph_style, paragraph_styles
+    doc = Document(source)
+    # p.style looks the style up (and rescans styles.xml for the default) on
+    # every call; resolve each paragraph's w:pStyle against one map instead
+    styles = paragraph_styles(doc.styles.element.iterchildren(W + "style"))
+    paragraphs = [
+        ParaRecord(
+            p.text or "",
+            paragraph_style(p._p, styles),
+            tuple(RunRecord(r.text or "", bool(r.bold), bool(r.italic)) for r in p.runs),
+        )
+        for p in doc.paragraphs
+    ]
+    tables = [[[c.text or "" for c in row.cells] for row in t.rows] for t in doc.tables]
+    return ParsedDocument(source, paragraphs, tables, name)
+
+def _file_name(source):
+    name = source.name if isinstance(source, ParsedDocument) else os.path.basename(source)
+    if name is None:
+        raise ValueError("in-memory documents need a filename: pass name= to load_document")
+    return name
+
 # ------------------- Convert Paragraph to HTML -------------------
+def _escape(text):
+    # quote=False: text only ever lands in element content, and apostrophes are common
+    return html.escape(text, quote=False)
+
 def paragraph_to_html(para):
-    """Convert a docx paragraph into HTML with basic formatting."""
+    """Convert a paragraph record into HTML with basic formatting."""
     text = para.text.strip()
     if not text:
         return ""
 
     # Check if it's a list item
-    if para.style.name.lower().startswith("list"):
-        return f"<li>{text}</li>"
+    if para.style.lower().startswith("list"):
+        return f"<li>{_escape(text)}</li>"
     
-    text = _remove_emojis(text)
+    text = _escape(_remove_emojis(text))
 
     # Headings
-    if para.style.name.startswith("Heading"):
-        level = para.style.name.replace("Heading", "").strip()
+    if para.style.startswith("Heading"):
+        level = para.style.replace("Heading", "").strip()
         level = int(level) if level.isdigit() else 2
         return f"<h{level}>{text}</h{level}>"
 
@@ -111,42 +178,417 @@ def paragraph_to_html(para):
 #         return f"<h{level}>{text}</h{level}>"
 #     return f"<p>{text}</p>"
 
-# ------------------- Extract Title -------------------
-def extract_title(docx_path: str) -> str:
-    doc = Document(docx_path)
-    filename = os.path.splitext(os.path.basename(docx_path))[0]
-    filename_low = filename.lower()
-    blocks = [(p, (p.text or "").strip()) for p in doc.paragraphs if (p.text or "").strip()]
+# ------------------- Table Index -------------------
+class TableIndex:
+    """Every table materialised once as stripped-text grids, plus the report attributes.
+
+    `grids` holds the stripped cell text and `low` the same lower-cased.
+    `coverage` is the grid of the first Report Coverage table (header row
+    mentions "report attribute" or "report coverage table"). Tables whose
+    header row has "Report Attribute" and "Details" columns are parsed into
+    `attributes` (lower-cased attribute -> details, first occurrence wins).
+    """
+
+    def __init__(self, tables):
+        self.grids = [[[c.strip() for c in row] for row in table] for table in tables]
+        self.low = [[[c.lower() for c in row] for row in grid] for grid in self.grids]
+        self.coverage = None
+        self.attributes = {}
+        self._attribute_tables = []  # [(attribute, details), ...] per attribute table
+
+        for grid, low in zip(self.grids, self.low):
+            if not grid:
+                continue
+            headers = low[0]
+            if self.coverage is None:
+                first_row_text = " ".join(headers)
+                if "report attribute" in first_row_text or "report coverage table" in first_row_text:
+                    self.coverage = grid
+            if "report attribute" in headers and "details" in headers:
+                attr_idx = headers.index("report attribute")
+                details_idx = headers.index("details")
+                pairs = [
+                    (row_low[attr_idx], row[details_idx])
+                    for row, row_low in zip(grid[1:], low[1:])
+                    if len(row) > max(attr_idx, details_idx)
+                ]
+                self._attribute_tables.append(pairs)
+                for attr, details in pairs:
+                    self.attributes.setdefault(attr, details)
+
+    def attribute(self, name):
+        """Details for an exact report attribute (case-insensitive), or ""."""
+        return self.attributes.get(name.strip().lower(), "")
+
+    def find_attribute(self, needle):
+        """Details of the first attribute containing `needle`; a later table's match wins."""
+        found = ""
+        for pairs in self._attribute_tables:
+            for attr, details in pairs:
+                if needle in attr:
+                    found = details
+                    break
+        return found
+
+    def title_cell(self):
+        """Cell right of (or below) the first "report title"-style cell that has text."""
+        for grid, low in zip(self.grids, self.low):
+            for r_idx, row in enumerate(low):
+                for c_idx, cell_text in enumerate(row):
+                    if not cell_text:
+                        continue
+                    if "report title" in cell_text or "full title" in cell_text or "full report title" in cell_text:
+                        if c_idx + 1 < len(row) and grid[r_idx][c_idx+1]:
+                            return grid[r_idx][c_idx+1]
+                        if r_idx + 1 < len(grid) and c_idx < len(grid[r_idx+1]) and grid[r_idx+1][c_idx]:
+                            return grid[r_idx+1][c_idx]
+        return ""
 
-    capture = False
-    for _, text in blocks:
-        text = remove_emojis(text)
-        if capture:
-            return _ensure_filename_start_and_year(text, filename)
+def table_index(docx_path):
+    """The document's TableIndex, built on first use and cached on the document."""
+    doc = load_document(docx_path)
+    index = doc.cache.get("tables")
+    if index is None:
+        index = doc.cache["tables"] = TableIndex(doc.tables)
+    return index
+
+# ------------------- Single-pass Section Scan -------------------
+# Each paragraph is normalised once (_Line) and handed to every collector that
+# still wants it, so all paragraph-based fields come out of one walk over the
+# document. A collector's feed() returns True once its section is complete;
+# the walk stops as soon as no collector needs more paragraphs.
+
+TARGET_HEADINGS = [
+    "introduction and strategic context",
+    "market segmentation and forecast scope",
+    "market trends and innovation landscape",
+    "competitive intelligence and benchmarking",
+    "regional landscape and adoption outlook",
+    "end-user dynamics and use case",
+    "recent developments + opportunities & restraints",
+]
+DESCRIPTION_END = "report summary, faqs, and seo schema"
+
+DEFAULT_MARKERS = MarkerSet(
+    headings=TARGET_HEADINGS,
+    description_end=DESCRIPTION_END,
+    toc_start="table of contents",
+    toc_end="list of figures",
+    meta_start="introduction",
+)
+
+def _env_markers():
+    path = os.environ.get("EXTRACTOR_MARKERS")
+    return load_markers(path, DEFAULT_MARKERS) if path else DEFAULT_MARKERS
+
+# The template markers the collectors use unless given others; $EXTRACTOR_MARKERS
+# names a JSON file of markers (groups it leaves out keep the defaults).
+MARKERS = _env_markers()
+
+def use_markers(markers):
+    """Make `markers` (a MarkerSet or a JSON file path) the default for this process.
+
+    A path is also exported as $EXTRACTOR_MARKERS, so worker processes
+    started afterwards use the same template.
+    """
+    global MARKERS
+    if not isinstance(markers, MarkerSet):
+        path = os.path.abspath(os.fspath(markers))
+        markers = load_markers(path, DEFAULT_MARKERS)
+        os.environ["EXTRACTOR_MARKERS"] = path
+    MARKERS = markers
+    return markers
+
+class _Line:
+    """A paragraph with its normalised forms, each computed at most once."""
+
+    def __init__(self, para):
+        self.para = para
+        self.raw = para.text or ""
+        self.stripped = self.raw.strip()
+
+    @cached_property
+    def text(self):
+        return remove_emojis(self.stripped)
+
+    @cached_property
+    def low(self):
+        return self.text.lower()
+
+    @cached_property
+    def raw_low(self):
+        return self.stripped.lower()
+
+    @cached_property
+    def heading(self):
+        return clean_heading(self.text)
+
+class _TitleCollector:
+    def __init__(self, markers=None):
+        self.title, self.capture, self.candidates = None, False, []
+
+    def feed(self, line):
+        if not line.stripped:
+            return False
+        # The last fallback depends on the filename, so keep only the lines it could pick.
+        low = line.raw_low
+        if low.startswith("full report title") or low.startswith("full title") or "forecast" in low:
+            self.candidates.append(line.stripped)
+        text = line.text
+        if self.capture:
+            self.title = text
+            return True
         if HEADER_LINE_RE.match(text):
             inline = _inline_title(text)
             if inline:
-                return _ensure_filename_start_and_year(inline, filename)
-            capture = True
+                self.title = inline
+                return True
+            self.capture = True
+        return False
+
+    def result(self, doc):
+        """Filename-independent half of extract_title: (direct title or None, fallback lines)."""
+        if self.title is not None:
+            return self.title, []
+        from_table = _title_from_tables(doc)
+        if from_table:
+            return from_table, []
+        return None, self.candidates
+
+# (bold, italic) -> opening and closing tags of a span
+SPAN_TAGS = {
+    (False, False): ("", ""),
+    (True, False): ("<b>", "</b>"),
+    (False, True): ("<i>", "</i>"),
+    (True, True): ("<b><i>", "</i></b>"),
+}
+
+def runs_to_html(runs):
+    """Paragraph runs as inline HTML, adjacent runs with the same formatting merged.
+
+    Word splits one bold phrase into many runs; they become a single
+    <b>...</b> instead of <b>a</b><b>b</b>. Text is kept whole, so spaces
+    between runs survive; whitespace-only runs join the span before them,
+    and a span's edge whitespace goes outside its tags. Each span is escaped
+    once. The result is stripped, like the paragraph text.
+    """
+    spans = []  # ((bold, italic), [text parts])
+    for run in runs:
+        text = remove_emojis(run.text)
+        if not text:
             continue
+        key = (bool(run.bold), bool(run.italic))
+        if spans and (spans[-1][0] == key or text.isspace()):
+            spans[-1][1].append(text)
+        elif not text.isspace():
+            spans.append((key, [text]))
+    out = []
+    for key, parts in spans:
+        text = "".join(parts)
+        core = text.strip()
+        lead = text[:len(text) - len(text.lstrip())]
+        trail = text[len(text.rstrip()):]
+        open_tag, close_tag = SPAN_TAGS[key]
+        out.append(f"{lead}{open_tag}{_escape(core)}{close_tag}{trail}")
+    return "".join(out).strip()
+
+class _DescriptionCollector:
+    def __init__(self, markers=None):
+        self.markers = markers or MARKERS
+        self.out, self.capture, self.inside_list = [], False, False
+
+    def feed(self, line):
+        if not line.text:
+            return False
+
+        markers = self.markers
+        matcher = markers.description
+        hits = matcher.hits(line.heading) if matcher.may_hit(line.low) else ()
+        matched = next((h for h in hits if h in markers.heading_html), None)
+
+        if not self.capture and matched:
+            self.capture = True  
+
+        if not self.capture:
+            return False
+        if any(h in markers.description_end for h in hits):
+            return True
+
+        out = self.out
+        if matched:
+            out.append("<br>")
+            out.append(markers.heading_html[matched])
+            return False
+
+        para = line.para
+        content = runs_to_html(para.runs)
+        if "list" in para.style.lower():
+            if not self.inside_list:
+                out.append("<ul>")
+                self.inside_list = True
+            out.append(f"<li>{content}</li>")
+            return False
+        if self.inside_list:
+            out.append("</ul>")
+            self.inside_list = False
+
+        out.append(f"<p>{content}</p>")
+        return False
+
+    def result(self, doc):
+        if self.inside_list:
+            self.out.append("</ul>")
+            self.inside_list = False
+        return "\n".join(self.out)
+
+class _TocCollector:
+    def __init__(self, markers=None):
+        self.markers = markers or MARKERS
+        self.out, self.inside_list, self.capture = [], False, False
+        self.end_reached = False
+
+    def feed(self, line):
+        low = line.low
+
+        if not self.capture:
+            if self.markers.toc_open.hits(low):
+                self.capture = True
+            return False
+
+        para = line.para
+        if self.markers.toc_close.hits(low):
+            html_part = paragraph_to_html(para)
+            if html_part:
+                self.out.append(html_part)  
+            self.end_reached = True
+            return False  
+
+        if self.end_reached:
+            style = para.style.lower()
+            if "heading" in style or NUMBERED_LINE_RE.match(line.text):
+                return True  
+
+        html_part = paragraph_to_html(para)
+        if html_part:
+            if html_part.startswith("<li>"):
+                if not self.inside_list:
+                    self.out.append("<ul>")
+                    self.inside_list = True
+            elif self.inside_list:
+                self.out.append("</ul>")
+                self.inside_list = False
+            self.out.append(html_part)
+        return False
+
+    def result(self, doc):
+        # every fragment is a tag, so there is no outer whitespace to strip
+        if self.inside_list:
+            self.out.append("</ul>")
+            self.inside_list = False
+        return "".join(self.out)
+
+class _MetaCollector:
+    def __init__(self, markers=None):
+        self.markers = markers or MARKERS
+        self.capture, self.meta = False, ""
+
+    def feed(self, line):
+        if not self.capture:
+            if self.markers.meta_open.hits(line.raw_low):
+                self.capture = True
+            return False
+        if line.stripped:
+            self.meta = line.stripped
+            return True
+        return False
+
+    def result(self, doc):
+        return self.meta
+
+class _TextCollector:
+    """Non-empty paragraph text joined by newlines (the input of the JSON-LD scan)."""
+
+    def __init__(self, markers=None):
+        self.parts = []
+
+    def feed(self, line):
+        if line.raw and line.stripped:
+            self.parts.append(line.raw)
+        return False
+
+    def result(self, doc):
+        return "\n".join(self.parts)
+
+SECTION_COLLECTORS = {
+    "title": _TitleCollector,
+    "description": _DescriptionCollector,
+    "toc": _TocCollector,
+    "meta": _MetaCollector,
+    "text": _TextCollector,
+}
+
+def scan_sections(docx_path, fields=tuple(SECTION_COLLECTORS), markers=None, bounds=None):
+    """Walk the paragraphs once and return {field: result} for each requested field.
+
+    `markers` is the template's MarkerSet (default: MARKERS). A `bounds` dict
+    is also filled with {field: (start, stop)} paragraph indexes: start is
+    the paragraph that opened the section (None if none did), stop the one
+    that closed it (None if it ran to the end).
+    """
+    doc = load_document(docx_path)
+    collectors = {f: SECTION_COLLECTORS[f](markers) for f in fields}
+    if bounds is not None:
+        bounds.update(_scan_bounds(doc, collectors))
+        return {f: c.result(doc) for f, c in collectors.items()}
+    active = list(collectors.values())
+    for para in doc.paragraphs:
+        line = _Line(para)
+        active = [c for c in active if not c.feed(line)]
+        if not active:
+            break
+    return {f: c.result(doc) for f, c in collectors.items()}
+
+def _scan_bounds(doc, collectors):
+    # the scan_sections loop, noting where each collector starts capturing and stops
+    spans = {f: [None, None] for f in collectors}
+    active = list(collectors.items())
+    for idx, para in enumerate(doc.paragraphs):
+        line = _Line(para)
+        still = []
+        for f, c in active:
+            done = c.feed(line)
+            span = spans[f]
+            if span[0] is None and (done or getattr(c, "capture", False)):
+                span[0] = idx
+            if done:
+                span[1] = idx
+            else:
+                still.append((f, c))
+        active = still
+        if not active:
+            break
+    return {f: tuple(span) for f, span in spans.items()}
 
-    for table in doc.tables:
-        for r_idx, row in enumerate(table.rows):
-            for c_idx, cell in enumerate(row.cells):
-                cell_text = (cell.text or "").strip().lower()
-                if not cell_text:
-                    continue
-                if "report title" in cell_text or "full title" in cell_text or "full report title" in cell_text:
-                    if c_idx + 1 < len(row.cells):
-                        nxt = row.cells[c_idx+1].text.strip()
-                        if nxt:
-                            return _ensure_filename_start_and_year(nxt, filename)
-                    if r_idx + 1 < len(table.rows):
-                        nxt = row.rows[r_idx+1].cells[c_idx].text.strip()
-                        if nxt:
-                            return _ensure_filename_start_and_year(nxt, filename)
-
-    for _, text in blocks:
+# ------------------- Extract Title -------------------
+def extract_title(docx_path) -> str:
+    doc = load_document(docx_path)
+    return _title_from_parts(_title_parts(doc), os.path.splitext(_file_name(doc))[0])
+
+def _title_parts(doc):
+    return scan_sections(doc, ("title",))["title"]
+
+def _title_from_tables(doc):
+    return table_index(doc).title_cell()
+
+NO_TITLE = "Title Not Available"
+
+def _title_from_parts(parts, filename):
+    title, candidates = parts
+    if title is not None:
+        return _ensure_filename_start_and_year(title, filename)
+
+    filename_low = filename.lower()
+    for text in candidates:
         low = text.lower()
         if low.startswith("full report title") or low.startswith("full title"):
             inline = _inline_title(text)
@@ -155,368 +597,117 @@ def extract_title(docx_path: str) -> str:
         if low.startswith(filename_low) and "forecast" in low:
             return _ensure_filename_start_and_year(text, filename)
 
-    return "Title Not Available"
+    return NO_TITLE
 
 # ------------------- Extract Description -------------------
 def extract_description(docx_path):
-    doc = Document(docx_path)
-    html_output = []
-    capture, inside_list = False, False  
-
-    target_headings = [
-        "introduction and strategic context",
-        "market segmentation and forecast scope",
-        "market trends and innovation landscape",
-        "competitive intelligence and benchmarking",
-        "regional landscape and adoption outlook",
-        "end-user dynamics and use case",
-        "recent developments + opportunities & restraints",
-    ]
-
-    def clean_heading(text):
-        text = remove_emojis(text.strip())
-        text = re.sub(r'^[^\w]+', '', text)  
-        text = re.sub(r'(?i)section\s*\d+[:\-]?\s*', '', text)  
-        text = re.sub(r'^\d+[\.\-\)]\s*', '', text)  
-        text = re.sub(r'\s+', ' ', text)  
-        return text.lower().strip()
-
-    def run_to_html(run):
-        text = remove_emojis(run.text.strip())
-        if not text:
-            return ""
-        if run.bold and run.italic:
-            return f"<b><i>{text}</i></b>"
-        elif run.bold:
-            return f"<b>{text}</b>"
-        elif run.italic:
-            return f"<i>{text}</i>"
-        return text
-
-    for para in doc.paragraphs:
-        text = remove_emojis(para.text.strip())
-        if not text:
-            continue
-
-        cleaned = clean_heading(text)
-
-        if not capture and any(h in cleaned for h in target_headings):
-            capture = True  
-
-        if capture and "report summary, faqs, and seo schema" in cleaned:
-            break  
-
-        if capture:
-            content = "".join(run_to_html(run) for run in para.runs if run.text.strip())
-
-            if any(h in cleaned for h in target_headings):
-                html_output.append("<br>")
-                matched = next(h for h in target_headings if h in cleaned)
-                html_output.append(f"<h2>{matched.title()}</h2>")
-                continue
-
-            if "list" in para.style.name.lower():
-                if not inside_list:
-                    html_output.append("<ul>")
-                    inside_list = True
-                html_output.append(f"<li>{content}</li>")
-                continue
-            else:
-                if inside_list:
-                    html_output.append("</ul>")
-                    inside_list = False
-
-            html_output.append(f"<p>{content}</p>")
-
-    if inside_list:
-        html_output.append("</ul>")
-    return "\n".join(html_output)
+    return scan_sections(docx_path, ("description",))["description"]
 
 
 # ------------------- TOC Extraction -------------------
 def extract_toc(docx_path):
-    doc = Document(docx_path)
-    html_output, inside_list, capture = [], False, False
-    end_reached = False
-
-    for para in doc.paragraphs:
-        text = remove_emojis(para.text.strip())
-        low = text.lower()
-
-        if not capture and "table of contents" in low:
-            capture = True
-            continue
-
-        if capture:
-            if "list of figures" in low:
-                html_part = paragraph_to_html(para)
-                if html_part:
-                    html_output.append(html_part)  
-                end_reached = True
-                continue  
-
-            if end_reached:
-                style = getattr(para.style, "name","").lower()
-                if "heading" in style or re.match(r"^\d+[\.\)]\s", text):
-                    break  
-
-            html_part = paragraph_to_html(para)
-            if html_part:
-                if html_part.startswith("<li>"):
-                    if not inside_list:
-                        html_output.append("<ul>")
-                        inside_list = True
-                    html_output.append(html_part)
-                else:
-                    if inside_list:
-                        html_output.append("</ul>")
-                        inside_list = False
-                    html_output.append(html_part)
-
-    if inside_list:
-        html_output.append("</ul>")
-    return "".join(html_output).strip()
-
-# ------------------- FAQ Schema -------------------
-def extract_faq_schema(docx_path):
-    doc = Document(docx_path)
-    paras = [remove_emojis(p.text) for p in doc.paragraphs if p.text and p.text.strip()]
-
-    capture, started, depth, buf = False, False, 0, []
-
-    for text in paras:
-        line = text.strip()
-        low = line.lower()
-
-        if not capture:
-            if "faq schema" in low:
-                capture = True
-            continue
-
-        if not started:
-            if low in ("json", "copyedit", "json copy", "json copyedit"):
-                continue
-            if "{" in line:
-                started = True
-            else:
-                continue
-
-        buf.append(line)
-        depth += line.count("{") - line.count("}")
-        if depth <= 0 and started:
-            break
-
-    return "\n".join(buf).strip()
-
-def extract_methodology_from_faqschema(docx_path):
-    faq_schema_str = extract_faq_schema(docx_path)
-    if not faq_schema_str:
-        return ""   
-    
-    try:
-        faq_data = json.loads(faq_schema_str)
-    except json.JSONDecodeError:
-        return ""   
-    
-    faqs = []
-    q_count = 0
-    for item in faq_data.get("mainEntity", []):
-        q_count += 1
-        question = remove_emojis(item.get("name", "").strip())
-        answer = remove_emojis(item.get("acceptedAnswer", {}).get("text", "").strip())
-        if question and answer:
-            faqs.append(
-                f"<p><strong>Q{q_count}: {html.escape(question)}</strong><br>"
-                f"A{q_count}: {html.escape(answer)}</p>"
-            )
-    return "\n".join(faqs)
-
+    return scan_sections(docx_path, ("toc",))["toc"]
 
 # ------------------- Report Coverage -------------------
 def extract_report_coverage_table_with_style(docx_path):
-    doc = Document(docx_path)
-
-    for table in doc.tables:
-        first_row_text = " ".join([c.text.strip().lower() for c in table.rows[0].cells])
-        if "report attribute" in first_row_text or "report coverage table" in first_row_text:
-            html = []
-            html.append('<h2><strong>7.1. Report Coverage Table</strong></h2>')
-            html.append('<table cellspacing="0" style="border-collapse:collapse; width:100%"><tbody>')
-
-            for r_idx, row in enumerate(table.rows):
-                html.append("<tr>")
-                for c_idx, cell in enumerate(row.cells):
-                    text = remove_emojis(cell.text.strip())
-
-                    bg = "#deeaf6" if r_idx % 2 == 1 else "#ffffff"
-                    if r_idx == 0:
-                        bg = "#5b9bd5"
-
-                    td_style = (
-                        f"background-color:{bg}; "
-                        "border:1px solid #9cc2e5; vertical-align:top; padding:4px;"
-                        "width:263px" if c_idx == 0 else
-                        f"background-color:{bg}; border:1px solid #9cc2e5; vertical-align:top; padding:4px; width:303px"
-                    )
-
-                    html.append(
-                        f'<td style="{td_style}"><p><strong>{text}</strong></p></td>'
-                        if c_idx == 0 or r_idx==0 else f'<td style="{td_style}"><p>{text}</p></td>'
-                    )
-                html.append("</tr>")
-            html.append("</tbody></table>")
-            return "\n".join(html)
-    return ""
+    return "".join(iter_coverage_html(docx_path))
+
+def _coverage_td_open(bg):
+    first = f"background-color:{bg}; border:1px solid #9cc2e5; vertical-align:top; padding:4px;width:263px"
+    other = f"background-color:{bg}; border:1px solid #9cc2e5; vertical-align:top; padding:4px; width:303px"
+    return f'\n<td style="{first}">', f'\n<td style="{other}">'
+
+# (first column, other columns) <td> openings for the header, odd and even rows
+COVERAGE_TD_OPEN = [_coverage_td_open(bg) for bg in ("#5b9bd5", "#deeaf6", "#ffffff")]
+
+def iter_coverage_html(docx_path):
+    """Yield the styled Report Coverage table HTML fragment by fragment (nothing if absent)."""
+    table = table_index(docx_path).coverage
+    if table is None:
+        return
+
+    yield '<h2><strong>7.1. Report Coverage Table</strong></h2>'
+    yield '\n<table cellspacing="0" style="border-collapse:collapse; width:100%"><tbody>'
+
+    for r_idx, row in enumerate(table):
+        yield "\n<tr>"
+        first_td, other_td = COVERAGE_TD_OPEN[0 if r_idx == 0 else 2 - r_idx % 2]
+        for c_idx, cell in enumerate(row):
+            text = _escape(remove_emojis(cell))
+            yield (
+                f'{first_td}<p><strong>{text}</strong></p></td>' if c_idx == 0 else
+                f'{other_td}<p><strong>{text}</strong></p></td>' if r_idx == 0 else
+                f'{other_td}<p>{text}</p></td>'
+            )
+        yield "\n</tr>"
+    yield "\n</tbody></table>"
 
 # ---------------------------------------Meta Discription---------------------------------------
 def extract_meta_description(docx_path):
-    doc = Document(docx_path)
-    capture = False
-    for para in doc.paragraphs:
-        text = para.text.strip()
-        low = text.lower()
-        if not capture and ("introduction" in low):
-            capture = True
-            continue
-        if capture and text:
-            return text
-    return ""
+    return scan_sections(docx_path, ("meta",))["meta"]
 # --------------------------------------------SEO title-------------------------------------------------------------
-def extract_seo_title(docx_path):
-    doc = Document(docx_path)
-    file_name = os.path.splitext(os.path.basename(docx_path))[0]  # File name without extension
-    
-    revenue_forecast = ""
-
-    # --- Check tables for Report Coverage ---
-    for table in doc.tables:
-        headers = [cell.text.strip().lower() for cell in table.rows[0].cells]
-
-        if "report attribute" in headers and "details" in headers:
-            attr_idx = headers.index("report attribute")
-            details_idx = headers.index("details")
-
-            for row in table.rows[1:]:
-                attr = row.cells[attr_idx].text.strip().lower()
-                details = row.cells[details_idx].text.strip()
-
-                if "revenue forecast in 2030" in attr:
-                    # replace USD with $
-                    revenue_forecast = details.replace("USD", "$").strip()
-                    break
+def _revenue_forecast(doc):
+    # replace USD with $
+    return table_index(doc).find_attribute("revenue forecast in 2030").replace("USD", "$").strip()
 
+def _seo_title(file_name, revenue_forecast):
     if revenue_forecast:
-        seo_title = f"{file_name} Size ({revenue_forecast}) 2030"
-    else:
-        seo_title = file_name  # fallback
+        return f"{file_name} Size ({revenue_forecast}) 2030"
+    return file_name  # fallback
 
-    return seo_title
+def extract_seo_title(docx_path):
+    doc = load_document(docx_path)
+    return _seo_title(os.path.splitext(_file_name(doc))[0], _revenue_forecast(doc))
 # -----------------------------------------------BreadCrumb Text----------------------------------------
-def extract_breadcrumb_text(docx_path):
-    doc = Document(docx_path)
-    file_name = os.path.splitext(os.path.basename(docx_path))[0]  # File name without extension
-    
-    revenue_forecast = ""
-
-    # --- Check tables for Report Coverage ---
-    for table in doc.tables:
-        headers = [cell.text.strip().lower() for cell in table.rows[0].cells]
-
-        if "report attribute" in headers and "details" in headers:
-            attr_idx = headers.index("report attribute")
-            details_idx = headers.index("details")
-
-            for row in table.rows[1:]:
-                attr = row.cells[attr_idx].text.strip().lower()
-                details = row.cells[details_idx].text.strip()
-
-                if "revenue forecast in 2030" in attr:
-                    # replace USD with $
-                    revenue_forecast = details.replace("USD", "$").strip()
-                    break
-
+def _breadcrumb_text(file_name, revenue_forecast):
     if revenue_forecast:
-        seo_title = f"{file_name} Report 2030"
-    else:
-        seo_title = file_name  # fallback
+        return f"{file_name} Report 2030"
+    return file_name  # fallback
 
-    return seo_title
+def extract_breadcrumb_text(docx_path):
+    doc = load_document(docx_path)
+    return _breadcrumb_text(os.path.splitext(_file_name(doc))[0], _revenue_forecast(doc))
 
 # ---------------------------------------------SkuCode-Extraction------------------------------
 def extract_sku_code(docx_path):
-    filename = os.path.basename(docx_path)
+    filename = _file_name(docx_path)
     sku_code = os.path.splitext(filename)[0].lower()
     return sku_code
 # ---------------------------------------------URLRP------------------------------
 def extract_sku_url(docx_path):
-    filename = os.path.basename(docx_path)
+    filename = _file_name(docx_path)
     sku_code = os.path.splitext(filename)[0].lower()
     return sku_code
 
-# ---------------------------------------------BreadCrumb Schema----------------------------
-def extract_breadcrumb_schema(docx_path):
-    doc = Document(docx_path)
-    paragraphs = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
-
-    capture = False
-    breadcrumb_data = []
-
-    for text in paragraphs:
-        low = text.lower()
-        if not capture and text.strip().startswith("{"):
-            capture = True
-        if capture and ("json copy" in low or "faq schema" in low):
-            break
-        if capture:
-            breadcrumb_data.append(text)
-
-    return "".join(breadcrumb_data).strip()
-# --------------------------------Schema 2-----------------------
+# ---------------------------------------------JSON-LD Schemas----------------------------
 def _get_text(docx_path):
-    doc = Document(docx_path)
-    return "\n".join(p.text for p in doc.paragraphs if p.text and p.text.strip())
+    return scan_sections(docx_path, ("text",))["text"]
+
+def jsonld_index(docx_path, text=None):
+    """JSON-LD objects of the document by @type, scanned and parsed once per document."""
+    doc = load_document(docx_path)
+    index = doc.cache.get("jsonld")
+    if index is None:
+        index = doc.cache["jsonld"] = JsonLdIndex(_get_text(doc) if text is None else text)
+    return index
 
 def _extract_json_block(text, type_name):
-    pat = re.compile(r'"@type"\s*:\s*"' + re.escape(type_name) + r'"')
-    m = pat.search(text)
-    if not m:
-        return ""
-    start_idx = text.rfind("{", 0, m.start())
-    if start_idx == -1:
-        return ""
-    depth, i, n = 0, start_idx, len(text)
-    block_chars = []
-    while i < n:
-        ch = text[i]
-        block_chars.append(ch)
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                break
-        i += 1
-    return "".join(block_chars).strip()
+    return JsonLdIndex(text).raw(type_name)
 
+# Schema 1
 def extract_breadcrumb_schema(docx_path):
-    text = _get_text(docx_path)
-    return _extract_json_block(text, "BreadcrumbList")
+    return jsonld_index(docx_path).raw("BreadcrumbList")
 
+# Schema 2
 def extract_faq_schema(docx_path):
-    text = _get_text(docx_path)
-    return _extract_json_block(text, "FAQPage")
+    return jsonld_index(docx_path).raw("FAQPage")
 
 # ------------------------Methodology-----------------------------------------
-import json
-import html
 def extract_methodology_from_faqschema(docx_path):
-    faq_schema_str = extract_faq_schema(docx_path)  
-    if not faq_schema_str:
-        return ""   
-    
-    try:
-        faq_data = json.loads(faq_schema_str)
-    except json.JSONDecodeError:
+    return _methodology_html(jsonld_index(docx_path).data("FAQPage"))
+
+def _methodology_html(faq_data):
+    if not faq_data:
         return ""   
     
     faqs = []
@@ -536,73 +727,215 @@ def extract_methodology_from_faqschema(docx_path):
 # ------------------- Merge -------------------
 def merge_description_and_coverage(docx_path):
     try:
+        docx_path = load_document(docx_path)
         desc_html = extract_description(docx_path) or ""
         coverage_html = extract_report_coverage_table_with_style(docx_path) or ""
-        merged_html = desc_html + "\n\n" + coverage_html if (desc_html or coverage_html) else ""
-        return merged_html
+        return _merge_html(desc_html, coverage_html)
     except Exception as e:
         return f"ERROR: {e}"
 
-# # ------------------- Run Extraction -------------------
-folder_path = r"C:\Users\Vishnu\Desktop\oldcontent\23 june\23 june"
-output_path = r"C:\Users\Vishnu\Documents\extracted_docs\Extraction_New_Title_Old400.xlsx"
-
-all_data = []
-
-for file in os.listdir(folder_path):
-    if not file.endswith(".docx") or file.startswith("~$"):
-        continue
-
-    doc_path = os.path.join(folder_path, file)
-    print(f"Processing: {file}")
-    title = extract_title(doc_path)
-    description_html = extract_description(doc_path)
-    toc=extract_toc(doc_path)
-    methodology=extract_methodology_from_faqschema(doc_path)
-    # methodology_html = extract_methodology(doc_path)
-    seo_title = extract_seo_title(doc_path)
-    breadcrumb_text = extract_breadcrumb_text(doc_path)
-    skucode = extract_sku_code(doc_path)
-    urlrp = extract_sku_url(doc_path)
-    breadcrumb_schema=extract_breadcrumb_schema(doc_path)
-    meta=extract_meta_description(doc_path)
-    schema2=extract_faq_schema(doc_path)
-    report=extract_report_coverage_table_with_style(doc_path)
-    merge=merge_description_and_coverage(doc_path)
-    chunks = split_into_excel_cells(merge)
-
-
-    row_data={
-        "File": file,
-        "Title": title,
-        "Description": description_html,
-        "TOC":toc,
-        "Segmentation":"<p>.</p>",
-        "Methodology":methodology,
-        "Publish_Date":date.today().strftime("%B %Y"),
-        "Currency":"USD",
-        "Single Price": 4485,
-        "Corporate Price": 6449,
-        "skucode": skucode,
-        "Total Page":"",
-        "Date": date.today().strftime("%Y-%m-%d"),  # always today's date
-        "urlNp": urlrp,
-        "Meta Discription":meta,
-        "Meta Keys":"",
-        "Base Year":"2024",
-        "history":"2019-2023",
-        "Enterprise Price": 8339,
-        "SEOTITLE": seo_title,
-        "BreadCrumb Text": breadcrumb_text,
-        "Schema 1":breadcrumb_schema,
-        "Schema 2":schema2,
-        "Report":report,
-        "Discription":merge
+def _merge_html(desc_html, coverage_html):
+    return desc_html + "\n\n" + coverage_html if (desc_html or coverage_html) else ""
+
+# ------------------- Row Builder -------------------
+# Fixed output columns, in order; Discription_Part{i} columns follow them.
+ROW_COLUMNS = [
+    "File", "Title", "Description", "TOC", "Segmentation", "Methodology",
+    "Publish_Date", "Currency", "Single Price", "Corporate Price", "skucode",
+    "Total Page", "Date", "urlNp", "Meta Discription", "Meta Keys", "Base Year",
+    "history", "Enterprise Price", "SEOTITLE", "BreadCrumb Text", "Schema 1",
+    "Schema 2", "Report", "Discription",
+]
+PART_PREFIX = "Discription_Part"
+
+# Bump whenever an extraction rule changes so cached rows are not reused.
+EXTRACTOR_VERSION = "5"
+
+def content_version(markers=None):
+    """EXTRACTOR_VERSION, tagged with the marker template when it is not the default."""
+    markers = markers or MARKERS
+    if markers == DEFAULT_MARKERS:
+        return EXTRACTOR_VERSION
+    return f"{EXTRACTOR_VERSION}+{markers.fingerprint}"
+
+def extract_content(docx_path, backend=None):
+    """Every field that depends only on the document's bytes, not its filename."""
+    doc = load_document(docx_path, backend)
+    sections = scan_sections(doc)
+    schemas = jsonld_index(doc, sections["text"])
+    report = extract_report_coverage_table_with_style(doc)
+    return {
+        "title_parts": sections["title"],
+        "revenue_forecast": _revenue_forecast(doc),
+        "Description": sections["description"],
+        "TOC": sections["toc"],
+        "Methodology": _methodology_html(schemas.data("FAQPage")),
+        "Meta Discription": sections["meta"],
+        "Schema 1": schemas.raw("BreadcrumbList"),
+        "Schema 2": schemas.raw("FAQPage"),
+        "Report": report,
+        "Discription": _merge_html(sections["description"] or "", report or ""),
     }
-    for i, chunk in enumerate(chunks, start=1):
-        row_data[f"Discription_Part{i}"] = chunk
-    all_data.append(row_data)
 
-df = pd.DataFrame(all_data)
-df.to_excel(output_path, index=False)
-print(f"Done! Extracted data saved in {output_path}")
+class RunConfig:
+    """Fields that are the same for every report in a run, computed once.
+
+    The run date defaults to today; Publish_Date and Date are formatted from
+    it when the config is created, not per row.
+    """
+    __slots__ = (
+        "currency", "single_price", "corporate_price", "enterprise_price", "base_year",
+        "history", "segmentation", "total_page", "meta_keys", "run_date", "publish_date", "date",
+    )
+
+    def __init__(self, currency="USD", single_price=4485, corporate_price=6449,
+                 enterprise_price=8339, base_year="2024", history="2019-2023",
+                 segmentation="<p>.</p>", total_page="", meta_keys="", run_date=None):
+        self.currency = currency
+        self.single_price = single_price
+        self.corporate_price = corporate_price
+        self.enterprise_price = enterprise_price
+        self.base_year = base_year
+        self.history = history
+        self.segmentation = segmentation
+        self.total_page = total_page
+        self.meta_keys = meta_keys
+        self.run_date = run_date or date.today()
+        self.publish_date = self.run_date.strftime("%B %Y")
+        self.date = self.run_date.strftime("%Y-%m-%d")
+
+class ReportRecord:
+    """One report's extracted fields; as_row() gives the output row.
+
+    Only the per-document fields are stored; the run-wide ones come from
+    the shared RunConfig.
+    """
+    __slots__ = (
+        "file", "title", "description", "toc", "methodology", "meta_description", "skucode",
+        "url", "seo_title", "breadcrumb_text", "breadcrumb_schema", "faq_schema", "report",
+        "merged", "config",
+    )
+
+    def __init__(self, file, title, description, toc, methodology, meta_description, skucode,
+                 url, seo_title, breadcrumb_text, breadcrumb_schema, faq_schema, report, merged,
+                 config):
+        self.file = file
+        self.title = title
+        self.description = description
+        self.toc = toc
+        self.methodology = methodology
+        self.meta_description = meta_description
+        self.skucode = skucode
+        self.url = url
+        self.seo_title = seo_title
+        self.breadcrumb_text = breadcrumb_text
+        self.breadcrumb_schema = breadcrumb_schema
+        self.faq_schema = faq_schema
+        self.report = report
+        self.merged = merged
+        self.config = config
+
+    def __repr__(self):
+        return f"ReportRecord({self.file!r}, title={self.title!r})"
+
+    def parts(self):
+        """The merged description split into Excel-sized cells."""
+        return split_into_excel_cells(self.merged)
+
+    def as_row(self):
+        """The output row: ROW_COLUMNS in order, then the Discription_Part{i} cells."""
+        cfg = self.config
+        row_data = {
+            "File": self.file,
+            "Title": self.title,
+            "Description": self.description,
+            "TOC": self.toc,
+            "Segmentation": cfg.segmentation,
+            "Methodology": self.methodology,
+            "Publish_Date": cfg.publish_date,
+            "Currency": cfg.currency,
+            "Single Price": cfg.single_price,
+            "Corporate Price": cfg.corporate_price,
+            "skucode": self.skucode,
+            "Total Page": cfg.total_page,
+            "Date": cfg.date,
+            "urlNp": self.url,
+            "Meta Discription": self.meta_description,
+            "Meta Keys": cfg.meta_keys,
+            "Base Year": cfg.base_year,
+            "history": cfg.history,
+            "Enterprise Price": cfg.enterprise_price,
+            "SEOTITLE": self.seo_title,
+            "BreadCrumb Text": self.breadcrumb_text,
+            "Schema 1": self.breadcrumb_schema,
+            "Schema 2": self.faq_schema,
+            "Report": self.report,
+            "Discription": self.merged,
+        }
+        for i, chunk in enumerate(self.parts(), start=1):
+            row_data[f"{PART_PREFIX}{i}"] = chunk
+        return row_data
+
+def build_record(content, file, config=None):
+    """Combine extract_content() output with the filename-derived and run-wide fields."""
+    filename = os.path.splitext(file)[0]
+    return ReportRecord(
+        file=file,
+        title=_title_from_parts(content["title_parts"], filename),
+        description=content["Description"],
+        toc=content["TOC"],
+        methodology=content["Methodology"],
+        meta_description=content["Meta Discription"],
+        skucode=extract_sku_code(file),
+        url=extract_sku_url(file),
+        seo_title=_seo_title(filename, content["revenue_forecast"]),
+        breadcrumb_text=_breadcrumb_text(filename, content["revenue_forecast"]),
+        breadcrumb_schema=content["Schema 1"],
+        faq_schema=content["Schema 2"],
+        report=content["Report"],
+        merged=content["Discription"],
+        config=config or RunConfig(),
+    )
+
+def build_row(content, file, config=None):
+    """Combine extract_content() output with the fields derived from the filename."""
+    return build_record(content, file, config).as_row()
+
+def extract_record(docx_path, config=None, backend=None, name=None):
+    """Parse one document (path, bytes, file object or ParsedDocument) into a ReportRecord.
+
+    In-memory input needs `name`, the logical filename (e.g. "X Market.docx").
+    """
+    doc = load_document(docx_path, backend, name)
+    return build_record(extract_content(doc), _file_name(doc), config)
+
+def extract_row(docx_path, backend=None, config=None, name=None):
+    """Parse the document once and run every extractor against it."""
+    return extract_record(docx_path, config, backend, name).as_row()
+
+def iter_records(source, config=None, backend=None, on_error=None):
+    """Lazily yield a ReportRecord per .docx in a folder, a single file or an iterable of paths.
+
+    Paths are pulled one at a time, so a generator of paths is never
+    materialised and only the current document is in memory. One RunConfig
+    is shared by the whole run. A failing file raises, unless `on_error` is
+    given: it is called with (path, exception) and the file is skipped.
+    For parallel, fault-tolerant runs use batch.iter_paths.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if os.path.isdir(source):
+            from batch import list_docx_files  # batch imports this module
+            folder = source
+            source = (os.path.join(folder, f) for f in list_docx_files(folder))
+        else:
+            source = [source]  # one file; a missing path fails like any other file
+    config = config or RunConfig()
+    for path in source:
+        try:
+            record = extract_record(path, config, backend)
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(path, e)
+            continue
+        yield record
@@ -0,0 +1,669 @@
+import fnmatch
+import hashlib
+import io
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing.connection import wait
+
+from Extractor import RunConfig, build_row, extract_content, extract_row
+
+# ------------------- Batch Helpers -------------------
+def list_docx_files(folder_path, include=None, exclude=None):
+    """Sorted .docx filenames in folder_path, skipping Word lock files.
+
+    include/exclude are optional lists of glob patterns matched against the
+    filename; a file must match at least one include and no exclude.
+    """
+    return sorted(f for f in os.listdir(folder_path) if _wanted(f, include, exclude))
+
+def _wanted(f, include=None, exclude=None):
+    return (
+        f.endswith(".docx") and not f.startswith("~$")
+        and (not include or any(fnmatch.fnmatch(f, p) for p in include))
+        and not (exclude and any(fnmatch.fnmatch(f, p) for p in exclude))
+    )
+
+def process_file(doc_path, backend=None, config=None):
+    """Extract one row; errors are returned instead of raised so a batch never aborts."""
+    try:
+        return extract_row(doc_path, backend, config), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def process_blob(item, backend=None, config=None):
+    """process_file for an in-memory document given as (filename, bytes)."""
+    name, data = item
+    try:
+        return extract_row(data, backend, config, name), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def process_member(member, archive, backend=None, config=None):
+    """process_file for a .docx inside a zip archive, read straight from the archive."""
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            data = zf.read(member)
+        return extract_row(data, backend, config, _member_name(member)), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def process_read(item, backend=None, config=None):
+    """process_blob for a file read ahead, given as (filename, bytes, read error or None)."""
+    name, data, err = item
+    if err is not None:
+        return None, err
+    return process_blob((name, data), backend, config)
+
+def process_file_hashed(doc_path, backend=None, config=None):
+    """process_file that also hashes the bytes it parsed: ((row, sha256), error).
+
+    The digest is None only when the file could not be read.
+    """
+    try:
+        with open(doc_path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        return (None, None), f"{type(e).__name__}: {e}"
+    row, err = process_blob((os.path.basename(doc_path), data), backend, config)
+    return (row, hashlib.sha256(data).hexdigest()), err
+
+def process_content(doc_path, backend=None):
+    """Like process_file, but returns the filename-independent content only."""
+    try:
+        return extract_content(doc_path, backend), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+_SERVED = "served"  # stands in for a read-ahead file that needs no parsing
+
+def process_read_content(data, backend=None):
+    """process_content for bytes read ahead; _SERVED comes back as (None, None)."""
+    if data == _SERVED:
+        return None, None
+    return process_content(data, backend)
+
+# ------------------- Batch Runner -------------------
+def iter_batch(folder_path, workers=None, cache=None, backend=None, include=None, exclude=None):
+    """Yield (filename, row, error) for every .docx in folder_path, sorted by filename.
+
+    See iter_paths for the worker, cache and backend options.
+    """
+    files = list_docx_files(folder_path, include, exclude)
+    yield from iter_paths([os.path.join(folder_path, f) for f in files], workers, cache, backend)
+
+def iter_paths(paths, workers=None, cache=None, backend=None, profiler=None, timeout=None,
+               max_memory=None, config=None, prefetch=None, digests=None):
+    """Yield (filename, row, error) for each .docx path, in the order given.
+
+    Files are spread across a pool of worker processes; results are yielded
+    in input order as soon as they are ready, so callers can stream rows
+    to a sink without holding the whole batch. Exactly one of row/error is None.
+
+    With a cache.ExtractionCache, files are hashed first: unchanged files are
+    served from the cache, byte-identical copies are parsed once, and only
+    the filename-derived fields are rebuilt for each copy.
+
+    `backend` picks the document reader ("docx" or "stream", see
+    Extractor.load_document); both give identical rows.
+
+    With an instrument.Profiler, each document is profiled in its worker
+    and the profile is added to the profiler as its result comes back.
+
+    `timeout` (seconds) and `max_memory` (MB of worker RSS) bound each
+    document: a worker that overruns is killed and replaced, and the file
+    gets an error instead of a row (see GuardedPool).
+
+    All rows share one Extractor.RunConfig (static fields and run date),
+    created here unless one is passed in.
+
+    With a prefetch.ReadAhead, files are read on its threads ahead of
+    extraction and handed to the workers as bytes, so reading the next files
+    overlaps parsing the current ones; each file's bytes count against its
+    memory budget until the file's result is back. Its timings say how long
+    the run stalled on I/O. With a cache as well, each file is hashed as its bytes
+    arrive and only cache misses go to the workers, as those same bytes, so
+    no file is read twice. It cannot be combined with a profiler.
+
+    With a dict as `digests`, the sha256 of each file is stored under its
+    path, taken from the same read its row came from (None if the file
+    could not be read, or its worker was killed before saying). This also
+    cannot be combined with a profiler.
+    """
+    config = config or RunConfig()
+    guard = (timeout, max_memory) if timeout or max_memory else None
+    paths = list(paths)
+    files = [os.path.basename(p) for p in paths]
+    workers = workers or os.cpu_count() or 1
+    if prefetch is not None and profiler is not None:
+        raise ValueError("a read-ahead cannot be combined with a profiler")
+    if digests is not None and profiler is not None:
+        raise ValueError("digests cannot be collected with a profiler")
+    if cache is None:
+        if prefetch is not None:
+            yield from _iter_prefetched(files, paths, workers, backend, guard, config, prefetch,
+                                        digests)
+        else:
+            yield from _iter_rows(files, paths, workers, backend, profiler, guard, config, digests)
+        return
+
+    if prefetch is not None:
+        yield from _iter_cached_prefetched(paths, workers, cache, backend, guard, config, prefetch,
+                                           digests)
+        return
+
+    from cache import file_digest
+
+    # a file that cannot be hashed gets its read error as its result, as it would uncached
+    hashes, unreadable = [], {}
+    for path in paths:
+        try:
+            hashes.append(file_digest(path))
+        except OSError as e:
+            unreadable[len(hashes)] = f"{type(e).__name__}: {e}"
+            hashes.append(None)
+    if digests is not None:
+        digests.update(zip(paths, hashes))
+    known, queued, to_parse = {}, set(), []
+    for path, digest in zip(paths, hashes):
+        if digest is None or digest in known or digest in queued:
+            continue
+        content = cache.get(digest)
+        if content is not None:
+            known[digest] = (content, None)
+        else:
+            queued.add(digest)
+            to_parse.append((digest, path))
+
+    parsed = _map(partial(process_content, backend=backend), [p for _, p in to_parse], workers,
+                  profiler, guard)
+    pending = iter(to_parse)
+    try:
+        for i, (file, digest) in enumerate(zip(files, hashes)):
+            if digest is None:
+                yield file, None, unreadable[i]
+                continue
+            while digest not in known:
+                parsed_digest, _ = next(pending)
+                content, err = next(parsed)
+                if err is None:
+                    cache.put(parsed_digest, content)
+                known[parsed_digest] = (content, err)
+            content, err = known[digest]
+            yield file, (build_row(content, file, config) if err is None else None), err
+    finally:
+        parsed.close()
+
+def _iter_rows(files, paths, workers, backend, profiler, guard, config, digests=None):
+    if digests is None:
+        fn, failed = partial(process_file, backend=backend, config=config), None
+    else:
+        fn, failed = partial(process_file_hashed, backend=backend, config=config), _failed_hashed
+    results = _map(fn, paths, workers, profiler, guard, failed)
+    try:
+        for path, file, (row, err) in zip(paths, files, results):
+            if digests is not None:
+                row, digests[path] = row
+            yield file, row, err
+    finally:
+        results.close()
+
+def _iter_prefetched(files, paths, workers, backend, guard, config, prefetch, digests=None):
+    def items():
+        for path, data, err in prefetch.iter(paths, hold=True):
+            if digests is not None:
+                digests[path] = None if data is None else hashlib.sha256(data).hexdigest()
+            yield (os.path.basename(path), data,
+                   None if err is None else f"{type(err).__name__}: {err}")
+
+    fn = partial(process_read, backend=backend, config=config)
+    results = _map_read(fn, items(), workers, guard, prefetch, lambda item: item[1])
+    try:
+        for file, (row, err) in zip(files, results):
+            yield file, row, err
+    finally:
+        results.close()
+
+def _iter_cached_prefetched(paths, workers, cache, backend, guard, config, prefetch,
+                            digests=None):
+    # Hash each file as the read-ahead hands it over; cache misses go to the
+    # workers as the bytes already read. `order` holds every file taken from
+    # the read-ahead so far as (filename, digest, read error), and `sent` the
+    # digests being parsed, in submission order. Under a guard, files that
+    # need no parsing still pass through the pool as _SERVED, so the pool
+    # takes exactly one read-ahead file per item and can check it is ready.
+    from collections import deque
+
+    order, sent, known = deque(), deque(), {}
+
+    def misses():
+        for path, data, err in prefetch.iter(paths, hold=True):
+            file = os.path.basename(path)
+            digest = None if err is not None else hashlib.sha256(data).hexdigest()
+            if digests is not None:
+                digests[path] = digest
+            if err is not None:
+                order.append((file, None, f"{type(err).__name__}: {err}"))
+            else:
+                order.append((file, digest, None))
+                if digest not in known and digest not in sent:
+                    content = cache.get(digest)
+                    if content is None:
+                        sent.append(digest)
+                        yield data
+                        continue
+                    known[digest] = (content, None)
+            prefetch.release(data)
+            if guard is not None:
+                sent.append(None)
+                yield _SERVED
+
+    fn = partial(process_read_content, backend=backend)
+    parsed = _map_read(fn, misses(), workers, guard, prefetch,
+                       lambda data: None if data == _SERVED else data)
+    exhausted = False
+    try:
+        while order or not exhausted:
+            while order and (order[0][1] is None or order[0][1] in known):
+                file, digest, err = order.popleft()
+                if digest is not None:
+                    content, err = known[digest]
+                    yield file, (build_row(content, file, config) if err is None else None), err
+                else:
+                    yield file, None, err
+            if exhausted:
+                break
+            try:
+                content, err = next(parsed)
+            except StopIteration:
+                exhausted = True
+                continue
+            digest = sent.popleft()
+            if digest is None:
+                continue
+            if err is None:
+                cache.put(digest, content)
+            known[digest] = (content, err)
+    finally:
+        parsed.close()
+
+def _map_read(fn, items, workers, guard, prefetch, data_of):
+    """Ordered results of fn over read-ahead items, holding their bytes until each result is in."""
+    def release(item):
+        prefetch.release(data_of(item))
+
+    if guard is None:
+        yield from _map_lazy(fn, items, workers, release)
+        return
+    with GuardedPool(fn, workers, *guard) as pool:
+        for result in pool.map(items, release, prefetch.ready):
+            yield result if not isinstance(result, Overrun) else _failed(result.error)
+
+def _map(fn, paths, workers, profiler=None, guard=None, failed=None):
+    """Ordered results of fn over paths, on a process pool when it is worth it.
+
+    fn returns (result, error); with a guard=(timeout, max_memory) a
+    document that overruns yields failed(error), by default (None, error).
+    """
+    if profiler is not None:
+        from instrument import run_profiled
+        fn = partial(run_profiled, fn, memory=profiler.memory)
+        results = _map(fn, paths, workers, guard=guard,
+                       failed=lambda err: ((None, err), {"seconds": 0.0, "peak_alloc_bytes": None,
+                                                         "stats": {}, "calls": {}}))
+        try:
+            for path, (result, profile) in zip(paths, results):
+                yield profiler.add(os.path.basename(path), result, profile)
+        finally:
+            results.close()
+        return
+    if guard is not None:
+        with GuardedPool(fn, workers, *guard) as pool:
+            for result in pool.map(paths):
+                yield result if not isinstance(result, Overrun) else (failed or _failed)(result.error)
+        return
+    if workers == 1 or len(paths) <= 1:
+        yield from map(fn, paths)
+        return
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(fn, paths, chunksize=chunksize)
+
+def _failed(error):
+    return None, error
+
+def _failed_hashed(error):
+    return (None, None), error
+
+# ------------------- Warm Pools -------------------
+# Long-running callers (watch mode, the HTTP service) start their workers up
+# front and have each import the parser stack, so the first document pays no
+# start-up or import cost.
+
+def warm_worker(backend=None):
+    """Pool initializer: import the parser stack once per worker, before any file arrives."""
+    import Extractor
+    if (backend or Extractor.DEFAULT_BACKEND) == "stream":
+        import docx_stream  # noqa: F401
+    else:
+        import docx  # noqa: F401
+
+def _worker_pid():
+    return os.getpid()
+
+def start_pool(workers, backend=None):
+    """A ProcessPoolExecutor whose workers import the parser stack as they start."""
+    return ProcessPoolExecutor(max_workers=workers, initializer=warm_worker, initargs=(backend,))
+
+def warm_up(pool, workers):
+    """Block until all `workers` of a start_pool() pool are running and warm.
+
+    Raises BrokenProcessPool if a worker dies while starting.
+    """
+    # workers start on demand; one task each brings them all up now
+    for future in [pool.submit(_worker_pid) for _ in range(workers)]:
+        future.result()
+
+# ------------------- Guarded Workers -------------------
+# A ProcessPoolExecutor cannot cancel a task that is already running, so one
+# document stuck in a pathological table or scan holds a worker (and the
+# ordered result stream) forever. GuardedPool gives every worker one document
+# at a time, watches its wall clock and resident memory from the parent, and
+# kills and replaces a worker that overruns.
+
+POLL_SECONDS = 0.2
+
+class Overrun:
+    """Placeholder result for a document whose worker was killed."""
+
+    def __init__(self, error):
+        self.error = error
+
+def _rss_mb(pid):
+    """Resident memory of a process in MB, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+def _limit_address_space(max_memory):
+    # Backstop for allocations faster than the parent's polling: twice the
+    # ceiling, as address space runs well ahead of resident memory.
+    try:
+        import resource
+    except ImportError:
+        return
+    limit = int(2 * max_memory * 1024 * 1024)
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        pass
+
+READY = "ready"
+
+def _worker_main(conn, fn, max_memory):
+    if max_memory:
+        _limit_address_space(max_memory)
+    conn.send(READY)  # fn and its imports are loaded; start the clock from here
+    while True:
+        try:
+            path = conn.recv()
+        except EOFError:
+            return
+        if path is None:
+            return
+        conn.send(fn(path))
+
+class _Worker:
+    def __init__(self, ctx, fn, max_memory):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, fn, max_memory), daemon=True)
+        self.process.start()
+        child.close()
+        self.ready = False
+        self.task = None  # (index, started) of the document in progress
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+class GuardedPool:
+    """Process pool that bounds every document's wall-clock time and memory.
+
+    Results come back as fn(path) would return them, or an Overrun when the
+    document hit `timeout` seconds, the `max_memory` MB ceiling, or crashed
+    its worker. Killed workers are replaced, so the rest of the batch runs
+    on. The memory ceiling needs /proc (Linux); elsewhere only the
+    address-space backstop applies, where the platform has one.
+    """
+
+    def __init__(self, fn, workers=None, timeout=None, max_memory=None):
+        self.fn = fn
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.restarts = 0
+        self._ctx = multiprocessing.get_context()
+        self._pool = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _spawn(self):
+        return _Worker(self._ctx, self.fn, self.max_memory)
+
+    def _replace(self, worker):
+        worker.kill()
+        self._pool[self._pool.index(worker)] = self._spawn()
+        self.restarts += 1
+
+    def map(self, paths, release=None, admit=None):
+        """Yield a result per path, in order; paths may be a lazy iterator.
+
+        A path is only taken from the iterator when a worker is free for it
+        and `admit()`, if given, is true; `release(path)` is called once the
+        path's result (or Overrun) is in.
+        """
+        if isinstance(paths, (list, tuple)) and not paths:
+            return
+        if not self._pool:
+            count = len(paths) if isinstance(paths, (list, tuple)) else self.workers
+            self._pool = [self._spawn() for _ in range(min(self.workers, count))]
+        done, pending, next_index, next_yield = {}, enumerate(paths), 0, 0
+        exhausted = False
+        sent = {}  # index -> path still awaiting its result, kept for release()
+
+        def finish(index, result):
+            done[index] = result
+            if release is not None:
+                release(sent.pop(index))
+
+        while not exhausted or next_yield < next_index:
+            for worker in self._pool:
+                if (worker.ready and worker.task is None and not exhausted
+                        and (admit is None or admit())):
+                    item = next(pending, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    index, path = item
+                    if release is not None:
+                        sent[index] = path
+                    worker.conn.send(path)
+                    worker.task = (index, time.monotonic())
+                    next_index += 1
+
+            starting = [w for w in self._pool if not w.ready]
+            busy = [w for w in self._pool if w.task is not None]
+            ready = wait([w.conn for w in starting + busy] + [w.process.sentinel for w in busy],
+                         POLL_SECONDS)
+            for worker in starting:
+                if worker.conn in ready:
+                    try:
+                        worker.ready = worker.conn.recv() == READY
+                    except (EOFError, OSError):
+                        raise RuntimeError("a batch worker failed to start") from None
+            for worker in busy:
+                index, started = worker.task
+                if worker.conn in ready:
+                    try:
+                        result = worker.conn.recv()
+                    except (EOFError, OSError):
+                        result = None
+                    if result is not None:
+                        finish(index, result)
+                        worker.task = None
+                        err = result[1] if isinstance(result, tuple) and len(result) == 2 else None
+                        if isinstance(err, str) and err.startswith("MemoryError"):
+                            self._replace(worker)  # the address-space backstop tripped
+                        continue
+                if not worker.process.is_alive():
+                    worker.process.join()
+                    finish(index, Overrun(f"WorkerCrashed: exit code {worker.process.exitcode}"))
+                    self._replace(worker)
+                    continue
+                elapsed = time.monotonic() - started
+                if self.timeout and elapsed > self.timeout:
+                    finish(index, Overrun(f"Timeout: no result after {self.timeout:g}s; "
+                                          "worker killed"))
+                    self._replace(worker)
+                    continue
+                rss = _rss_mb(worker.process.pid) if self.max_memory else None
+                if rss is not None and rss > self.max_memory:
+                    finish(index, Overrun(f"MemoryLimit: worker reached {rss:.0f} MB "
+                                          f"(limit {self.max_memory:g} MB); worker killed"))
+                    self._replace(worker)
+
+            while next_yield in done:
+                yield done.pop(next_yield)
+                next_yield += 1
+
+    def close(self):
+        for worker in self._pool:
+            if worker.task is None and worker.process.is_alive():
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+                worker.process.join(1)
+            if worker.process.is_alive():
+                worker.kill()
+        self._pool = []
+
+# ------------------- Zip Archives -------------------
+def _member_name(member):
+    return member.rsplit("/", 1)[-1]  # zip member names always use "/"
+
+def list_zip_members(archive, include=None, exclude=None):
+    """.docx members of a zip archive, ordered by filename as a folder run would be.
+
+    `archive` is a path, bytes or a binary file object. Lock files, macOS
+    resource forks and directories are skipped; include/exclude globs match
+    the member's filename.
+    """
+    if isinstance(archive, (bytes, bytearray, memoryview)):
+        archive = io.BytesIO(archive)
+    with zipfile.ZipFile(archive) as zf:
+        members = [
+            info.filename for info in zf.infolist()
+            if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+            and _wanted(_member_name(info.filename), include, exclude)
+        ]
+    return sorted(members, key=lambda m: (_member_name(m), m))
+
+def iter_zip(archive, workers=None, backend=None, include=None, exclude=None, timeout=None,
+             max_memory=None, config=None):
+    """Yield (filename, row, error) for each .docx member of a zip archive, in order.
+
+    Nothing is unpacked to disk. For an archive on disk each worker opens it
+    and reads its own member; an archive given as bytes or a file object is
+    read here, one member at a time as the workers ask for them. Other
+    options are as in iter_paths.
+    """
+    config = config or RunConfig()
+    workers = workers or os.cpu_count() or 1
+    guard = (timeout, max_memory) if timeout or max_memory else None
+    members = list_zip_members(archive, include, exclude)
+    files = [_member_name(m) for m in members]
+    if isinstance(archive, (str, os.PathLike)):
+        fn = partial(process_member, archive=os.fspath(archive), backend=backend, config=config)
+        results, zf = _map(fn, members, workers, guard=guard), None
+    else:
+        if isinstance(archive, (bytes, bytearray, memoryview)):
+            archive = io.BytesIO(archive)
+        zf = zipfile.ZipFile(archive)
+        blobs = ((_member_name(m), zf.read(m)) for m in members)
+        fn = partial(process_blob, backend=backend, config=config)
+        if guard is not None:
+            results = _map(fn, blobs, workers, guard=guard)
+        else:
+            results = _map_lazy(fn, blobs, workers)
+    try:
+        for file, (row, err) in zip(files, results):
+            yield file, row, err
+    finally:
+        results.close()
+        if zf is not None:
+            zf.close()
+
+def _map_lazy(fn, items, workers, release=None):
+    """Ordered map over an iterator that keeps at most two items per worker in flight.
+
+    `release(item)` is called as each item's result comes back.
+    """
+    from collections import deque
+
+    if workers == 1:
+        for item in items:
+            result = fn(item)
+            if release is not None:
+                release(item)
+            yield result
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            future = pool.submit(fn, item)
+            if release is not None:
+                # runs on the pool's result thread, so memory frees while we wait for items
+                future.add_done_callback(lambda _, item=item: release(item))
+            pending.append(future)
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def run_batch(folder_path, workers=None, sink=None, cache=None, backend=None,
+              include=None, exclude=None):
+    """Extract every .docx in folder_path; returns (rows, errors).
+
+    Rows come back sorted by filename whatever the worker count, so the
+    output matches a serial run (workers=1). errors is a list of
+    (filename, message). With a sink, rows are written to it as they
+    arrive and not kept, so the returned row list is empty.
+    """
+    return consume(iter_batch(folder_path, workers, cache, backend, include, exclude), sink)
+
+def consume(results, sink=None, log=print):
+    """Drain (filename, row, error) results into a sink or a list; returns (rows, errors)."""
+    rows, errors = [], []
+    for file, row, err in results:
+        if err is not None:
+            log(f"Failed: {file}: {err}")
+            errors.append((file, err))
+            continue
+        log(f"Processing: {file}")
+        if sink is not None:
+            sink.write(row)
+        else:
+            rows.append(row)
+    return rows, errors
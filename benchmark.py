@@ -0,0 +1,371 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+
+import Extractor
+from Extractor import TARGET_HEADINGS
+
+# ------------------- Synthetic Reports -------------------
+WORDS = (
+    "market growth demand revenue adoption segment regional forecast players strategy "
+    "innovation pricing supply chain regulation investment share outlook analysis"
+).split()
+EMOJIS = ["🚀", "📈", "✅", "💡", "📌"]
+
+def _sentence(rng, n=14):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+def make_report(path, name, paragraphs=40, table_rows=12, faqs=5, seed=0):
+    """Write a synthetic report .docx shaped like the real ones.
+
+    It has a "Report Title" header, a table of contents with list items,
+    the seven description headings with `paragraphs` body paragraphs spread
+    across them (bold/italic split runs, bullets, emojis), a
+    "Report Attribute / Details" coverage table with `table_rows` rows, and
+    BreadcrumbList / FAQPage JSON-LD with `faqs` questions.
+    """
+    from docx import Document
+
+    rng = random.Random(seed)
+    doc = Document()
+    doc.add_paragraph("Report Title " + rng.choice(EMOJIS))
+    doc.add_paragraph(f"{name} Size, Share & Trends Analysis Report, 2024–2030")
+
+    doc.add_paragraph("Table of Contents", style="Heading 1")
+    for i, heading in enumerate(TARGET_HEADINGS, start=1):
+        doc.add_paragraph(f"{i}. {heading.title()}", style="List Number")
+    doc.add_paragraph("List of Figures")
+    for i in range(3):
+        doc.add_paragraph(f"Figure {i + 1}: {_sentence(rng, 5)}", style="List Bullet")
+    doc.add_paragraph("1. Introduction", style="Heading 1")
+
+    per_section = max(1, paragraphs // len(TARGET_HEADINGS))
+    for i, heading in enumerate(TARGET_HEADINGS, start=1):
+        doc.add_paragraph(f"{rng.choice(EMOJIS)} Section {i}: {heading.title()}", style="Heading 2")
+        for _ in range(per_section):
+            p = doc.add_paragraph()
+            for word in _sentence(rng, 4).split():
+                p.add_run(word + " ").bold = True  # Word often splits one bold phrase
+            p.add_run(_sentence(rng) + " ")
+            p.add_run(_sentence(rng, 6)).italic = True
+        for _ in range(3):
+            doc.add_paragraph(_sentence(rng, 8) + " " + rng.choice(EMOJIS), style="List Bullet")
+
+    table = doc.add_table(rows=table_rows + 1, cols=2)
+    attributes = [("Report Attribute", "Details"), ("Revenue Forecast in 2030", "USD 12.4 Billion"),
+                  ("Base Year", "2024"), ("Forecast Period", "2024–2030")]
+    attributes += [(f"Attribute {i}", _sentence(rng, 10)) for i in range(table_rows)]
+    for row, (attr, details) in zip(table.rows, attributes):
+        row.cells[0].text = attr
+        row.cells[1].text = details
+
+    doc.add_paragraph("Report Summary, FAQs, and SEO Schema", style="Heading 1")
+    breadcrumb = {
+        "@context": "https://schema.org", "@type": "BreadcrumbList",
+        "itemListElement": [
+            {"@type": "ListItem", "position": i + 1, "name": n, "item": f"https://example.com/{n.lower()}"}
+            for i, n in enumerate(["Home", "Reports", name])
+        ],
+    }
+    doc.add_paragraph("JSON copy")
+    for line in json.dumps(breadcrumb, indent=2).splitlines():
+        doc.add_paragraph(line)
+    faq = {
+        "@context": "https://schema.org", "@type": "FAQPage",
+        "mainEntity": [
+            {"@type": "Question", "name": f"{_sentence(rng, 6)[:-1]}?",
+             "acceptedAnswer": {"@type": "Answer", "text": _sentence(rng, 20)}}
+            for _ in range(faqs)
+        ],
+    }
+    doc.add_paragraph("FAQ Schema")
+    doc.add_paragraph("json")
+    for line in json.dumps(faq, indent=2).splitlines():
+        doc.add_paragraph(line)
+    doc.save(path)
+
+def make_corpus(folder, files, variants=20, **shape):
+    """Fill `folder` with `files` reports built from `variants` distinct documents."""
+    os.makedirs(folder, exist_ok=True)
+    templates = []
+    for v in range(min(variants, files)):
+        name = f"Synthetic Widget {v:05d} Market"
+        path = os.path.join(folder, name + ".docx")
+        make_report(path, name, seed=v, **shape)
+        templates.append(path)
+    for i in range(len(templates), files):
+        shutil.copyfile(templates[i % len(templates)],
+                        os.path.join(folder, f"Synthetic Widget {i:05d} Market.docx"))
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder))
+
+# ------------------- Measurements -------------------
+EXTRACTORS = [
+    "extract_title", "extract_description", "extract_toc", "extract_methodology_from_faqschema",
+    "extract_seo_title", "extract_breadcrumb_text", "extract_sku_code", "extract_sku_url",
+    "extract_breadcrumb_schema", "extract_meta_description", "extract_faq_schema",
+    "extract_report_coverage_table_with_style", "merge_description_and_coverage",
+]
+
+def _ms_stats(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {}
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return {
+        "count": len(samples),
+        "mean_ms": round(1000 * statistics.fmean(samples), 3),
+        "p50_ms": round(1000 * pick(0.50), 3),
+        "p90_ms": round(1000 * pick(0.90), 3),
+        "p99_ms": round(1000 * pick(0.99), 3),
+        "max_ms": round(1000 * samples[-1], 3),
+    }
+
+def peak_rss_mb(children=False):
+    """Peak resident set size of this process, or None where unsupported.
+
+    With children=True, the peak of the largest finished child process
+    (e.g. a pool worker) instead; the OS keeps no sum across children.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def time_extractors(paths, backend=None):
+    """Per-extractor latency; every call gets a freshly parsed document."""
+    timings = {"load_document": []}
+    for path in paths:
+        for name in EXTRACTORS:
+            t = time.perf_counter()
+            doc = Extractor.load_document(path, backend)
+            list(doc.paragraphs)  # the stream backend parses lazily; count the parse as load
+            timings["load_document"].append(time.perf_counter() - t)
+            fn = getattr(Extractor, name)
+            t = time.perf_counter()
+            fn(doc)
+            timings.setdefault(name, []).append(time.perf_counter() - t)
+    return {name: _ms_stats(samples) for name, samples in timings.items()}
+
+def _timed_row(path, backend=None):
+    t = time.perf_counter()
+    row = Extractor.extract_row(path, backend)
+    return row, time.perf_counter() - t
+
+def run_size(folder, files, backend=None, workers=1):
+    """Row build and Excel write over the first `files` documents (run in a fresh process).
+
+    Latencies are timed around each document where it is extracted, in the
+    worker when there are several. peak_rss_mb is this process (which
+    holds the rows and writes the workbook); peak_worker_rss_mb is the
+    largest worker, once the pool has exited.
+    """
+    from batch import _map
+    from sinks import ExcelSink
+
+    paths = sorted(os.path.join(folder, f) for f in os.listdir(folder))[:files]
+    latencies, rows = [], []
+    t0 = time.perf_counter()
+    for row, seconds in _map(partial(_timed_row, backend=backend), paths, workers):
+        rows.append(row)
+        latencies.append(seconds)
+    build_s = time.perf_counter() - t0
+
+    out = tempfile.mkdtemp(prefix="bench_xlsx_")
+    try:
+        t = time.perf_counter()
+        with ExcelSink(os.path.join(out, "bench.xlsx")) as sink:
+            for row in rows:
+                sink.write(row)
+        write_s = time.perf_counter() - t
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+    return {
+        "files": len(paths),
+        "workers": workers,
+        "row_build_s": round(build_s, 3),
+        "files_per_s": round(len(paths) / build_s, 2) if build_s else None,
+        "latency": _ms_stats(latencies),
+        "excel_write_s": round(write_s, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_worker_rss_mb": peak_rss_mb(children=True) if workers > 1 else None,
+    }
+
+# ------------------- Marker Matching -------------------
+def _marker_strategies(markers):
+    """Per-paragraph section-marker checks, old and new: name -> fn(text)."""
+    import re
+    from textnorm import clean_heading
+
+    description = markers.headings + markers.description_end
+    others = markers.toc_start + markers.toc_end + markers.meta_start
+
+    def per_marker(text):
+        # what the collectors did before MarkerSet: every check a separate scan
+        cleaned, low = clean_heading(text), text.lower()
+        return ([h for h in description if h in cleaned], [m for m in others if m in low])
+
+    def _alternation(group):
+        return re.compile("|".join(re.escape(m) for m in sorted(group, key=len, reverse=True)))
+
+    heading_re, other_re = _alternation(description), _alternation(others)
+
+    def alternation(text):
+        return heading_re.findall(clean_heading(text)), other_re.findall(text.lower())
+
+    def matcher(text):
+        low, m = text.lower(), markers.description
+        return (m.hits(clean_heading(text)) if m.may_hit(low) else (),
+                markers.toc_open.hits(low) + markers.toc_close.hits(low) + markers.meta_open.hits(low))
+
+    strategies = {"per_marker": per_marker, "alternation": alternation}
+    try:
+        import ahocorasick
+    except ImportError:
+        pass
+    else:
+        automaton = ahocorasick.Automaton()
+        for m in set(description + others):
+            automaton.add_word(m, m)
+        automaton.make_automaton()
+
+        def aho_corasick(text):
+            return [m for _, m in automaton.iter(clean_heading(text))]
+
+        strategies["aho_corasick"] = aho_corasick
+    strategies["matcher"] = matcher
+    return strategies
+
+def time_markers(lengths=(100, 1000, 10000), number=500, markers=None, seed=0):
+    """Microseconds per body paragraph for each marker-matching strategy, by paragraph length."""
+    from textnorm import _clean_heading_memo
+
+    markers = markers or Extractor.MARKERS
+    rng = random.Random(seed)
+    results = {}
+    for length in lengths:
+        texts = []  # distinct paragraphs, as in a real document
+        for _ in range(number):
+            text = ""
+            while len(text) < length:
+                text += _sentence(rng) + " "
+            texts.append(text[:length])
+        row = {}
+        for name, fn in _marker_strategies(markers).items():
+            best = float("inf")
+            for _ in range(3):
+                _clean_heading_memo.cache_clear()
+                t = time.perf_counter()
+                for text in texts:
+                    fn(text)
+                best = min(best, time.perf_counter() - t)
+            row[name] = round(1e6 * best / number, 2)
+        results[length] = row
+    return results
+
+# ------------------- Runner -------------------
+def run_benchmark(sizes=(10, 100, 1000), paragraphs=40, table_rows=12, faqs=5, variants=20,
+                  backend=None, workers=1, extractor_sample=20, corpus_dir=None):
+    """Build a synthetic corpus and measure it; returns a JSON-able result dict."""
+    owns_dir = corpus_dir is None
+    corpus_dir = corpus_dir or tempfile.mkdtemp(prefix="bench_corpus_")
+    try:
+        t = time.perf_counter()
+        paths = make_corpus(corpus_dir, max(sizes), variants,
+                            paragraphs=paragraphs, table_rows=table_rows, faqs=faqs)
+        generate_s = time.perf_counter() - t
+
+        runs = []
+        for size in sorted(sizes):
+            # a fresh process per size so peak RSS belongs to that size alone
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                result = pool.submit(run_size, corpus_dir, size, backend, workers).result()
+            print(f"{size:>6} files: {result['files_per_s']} files/s, "
+                  f"p50 {result['latency'].get('p50_ms')} ms, excel {result['excel_write_s']} s, "
+                  f"peak RSS {result['peak_rss_mb']} MB"
+                  + (f" (largest worker {result['peak_worker_rss_mb']} MB)"
+                     if result["peak_worker_rss_mb"] is not None else ""), file=sys.stderr)
+            runs.append(result)
+
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "extractor_version": Extractor.EXTRACTOR_VERSION,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": backend or Extractor.DEFAULT_BACKEND,
+            "shape": {"paragraphs": paragraphs, "table_rows": table_rows, "faqs": faqs,
+                      "variants": variants},
+            "generate_s": round(generate_s, 3),
+            "runs": runs,
+            "extractors": time_extractors(paths[:extractor_sample], backend),
+        }
+    finally:
+        if owns_dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+def save_result(result, path):
+    """Append a result to the JSON history file at `path` (a list of runs)."""
+    history = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            history = json.load(f)
+    history.append(result)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+    return history
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the extractors on synthetic reports.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000],
+                        help="corpus sizes to measure (default: 10 100 1000)")
+    parser.add_argument("--paragraphs", type=int, default=40, help="body paragraphs per report")
+    parser.add_argument("--table-rows", type=int, default=12, help="coverage table rows")
+    parser.add_argument("--faqs", type=int, default=5, help="FAQ questions per report")
+    parser.add_argument("--variants", type=int, default=20,
+                        help="distinct documents generated; the rest are renamed copies")
+    parser.add_argument("--backend", choices=Extractor.BACKENDS, default=None)
+    parser.add_argument("-j", "--workers", type=int, default=1)
+    parser.add_argument("--extractor-sample", type=int, default=20,
+                        help="documents used for the per-extractor timings")
+    parser.add_argument("--corpus-dir", help="keep the generated corpus here")
+    parser.add_argument("--out", default="benchmark_results.json",
+                        help="JSON history file the result is appended to")
+    parser.add_argument("--markers", action="store_true",
+                        help="only time section-marker matching per paragraph and print it")
+    args = parser.parse_args(argv)
+
+    if args.markers:
+        timings = time_markers()
+        names = list(next(iter(timings.values())))
+        print("chars  " + "".join(f"{n:>14}" for n in names) + "   (us per paragraph)")
+        for length, row in timings.items():
+            print(f"{length:>5}  " + "".join(f"{row[n]:>14}" for n in names))
+        return 0
+
+    result = run_benchmark(args.sizes, args.paragraphs, args.table_rows, args.faqs, args.variants,
+                           args.backend, args.workers, args.extractor_sample, args.corpus_dir)
+    history = save_result(result, args.out)
+    if len(history) > 1:
+        before = {r["files"]: r["files_per_s"] for r in history[-2]["runs"]}
+        for r in result["runs"]:
+            if before.get(r["files"]):
+                change = 100 * (r["files_per_s"] / before[r["files"]] - 1)
+                print(f"{r['files']:>6} files: {change:+.1f}% files/s vs previous run", file=sys.stderr)
+    print(f"Results appended to {args.out}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import sqlite3
+
+from Extractor import content_version
+
+def file_digest(path, chunk_size=1 << 20):
+    """sha256 of a file's bytes, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+# ------------------- Extraction Cache -------------------
+class ExtractionCache:
+    """Persistent store of extract_content() results keyed by content hash.
+
+    Entries are keyed by (sha256 of the .docx, Extractor.content_version()),
+    so an unchanged file is never parsed twice, and bumping the version or
+    switching marker templates does not reuse results from the old rules.
+    Only filename-independent content is stored; Extractor.build_row() adds
+    the filename fields, which lets byte-identical copies under different
+    names share one entry.
+    """
+
+    def __init__(self, db_path, version=None):
+        self.version = version or content_version()
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS content ("
+            " digest TEXT NOT NULL, version TEXT NOT NULL, data TEXT NOT NULL,"
+            " PRIMARY KEY (digest, version))"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, digest):
+        """Cached content for a digest, or None."""
+        cur = self._conn.execute(
+            "SELECT data FROM content WHERE digest = ? AND version = ?",
+            (digest, self.version),
+        )
+        found = cur.fetchone()
+        if found is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(found[0])
+
+    def put(self, digest, content):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO content (digest, version, data) VALUES (?, ?, ?)",
+            (digest, self.version, json.dumps(content)),
+        )
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,208 @@
+import time
+
+_T0 = time.perf_counter()  # first thing the entry point runs; --timing counts start-up from here
+
+import argparse
+import os
+import sys
+
+from Extractor import BACKENDS
+
+# ------------------- Command Line -------------------
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m Extractor",
+        description="Extract report fields from .docx files into Excel (or JSON lines).",
+    )
+    parser.add_argument("input",
+                        help="a .docx file, a folder or .zip of .docx files, or - to read one "
+                             ".docx from stdin")
+    parser.add_argument(
+        "-o", "--output", action="append", metavar="PATH",
+        help="output file: .xlsx, .csv, .jsonl or .parquet, or - to print one JSON row "
+             "per line (default: -); repeat to write several formats in one run",
+    )
+    parser.add_argument("--name", metavar="FILENAME",
+                        help="with input -, the document's filename (used for title and URL)")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="only process filenames matching GLOB (repeatable)")
+    parser.add_argument("--exclude", action="append", metavar="GLOB",
+                        help="skip filenames matching GLOB (repeatable)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--backend", choices=BACKENDS, default=None,
+                        help="document reader (default: $EXTRACTOR_BACKEND or docx)")
+    parser.add_argument("--markers", metavar="JSON",
+                        help="section markers of the report template (default: $EXTRACTOR_MARKERS "
+                             "or the built-in ones)")
+    parser.add_argument("--timeout", type=float, default=None, metavar="SECONDS",
+                        help="give up on a document after this long and restart its worker")
+    parser.add_argument("--max-memory", type=float, default=None, metavar="MB",
+                        help="kill and restart a worker whose memory passes this many MB")
+    parser.add_argument("--prefetch", type=int, default=None, metavar="N",
+                        help="read up to N files ahead on I/O threads while others are parsed "
+                             "(for slow or network drives)")
+    parser.add_argument("--prefetch-mb", type=float, default=256, metavar="MB",
+                        help="with --prefetch, most memory held by files read ahead or in flight "
+                             "to a worker (default: 256)")
+    parser.add_argument("--cache", metavar="PATH",
+                        help="SQLite extraction cache; unchanged files are not re-parsed")
+    parser.add_argument("--max-rows", type=int, default=None,
+                        help="start a new workbook after this many rows")
+    parser.add_argument("--part-columns", type=int, default=None, metavar="N",
+                        help="Discription_Part columns in Excel output (default: 10); a row "
+                             "needing more starts a new workbook")
+    parser.add_argument("--row-group-size", type=int, default=1000,
+                        help="rows per Parquet row group (default: 1000)")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and extract .docx files as they are added or changed")
+    parser.add_argument("--new-only", action="store_true",
+                        help="with --watch, ignore files already in the folder at start")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="with --watch, seconds between folder scans (default: 1)")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="with --watch, seconds a file must stay unchanged (default: 2)")
+    parser.add_argument("--timing", action="store_true",
+                        help="report start-up and extraction time on stderr")
+    parser.add_argument("--profile", metavar="REPORT",
+                        help="time every extractor call and write a .json or .csv run report")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="with --profile, also trace allocations (slower)")
+    parser.add_argument("--top", type=int, default=10,
+                        help="with --profile, list the N slowest documents (default: 10)")
+    return parser
+
+def _input_paths(args):
+    from batch import list_docx_files, list_zip_members
+
+    if args.input == "-":
+        return [args.name]
+    if args.input.lower().endswith(".zip") and os.path.isfile(args.input):
+        return list_zip_members(args.input, args.include, args.exclude)
+    if os.path.isfile(args.input):
+        return [args.input]
+    files = list_docx_files(args.input, args.include, args.exclude)
+    return [os.path.join(args.input, f) for f in files]
+
+def _stream_results(args, workers):
+    """(filename, row, error) for stdin or zip input, which bypass the cache and profiler."""
+    from batch import iter_zip, process_blob
+
+    if args.input == "-":
+        row, err = process_blob((args.name, sys.stdin.buffer.read()), args.backend)
+        return [(args.name, row, err)]
+    return iter_zip(args.input, workers, args.backend, args.include, args.exclude,
+                    args.timeout, args.max_memory)
+
+def _open_output(args):
+    from sinks import DEFAULT_PART_COLUMNS, open_sinks
+    return open_sinks(args.output or ["-"], args.max_rows, args.row_group_size,
+                      args.part_columns or DEFAULT_PART_COLUMNS)
+
+def _log(message):
+    # progress goes to stderr so stdout stays clean for JSON rows
+    print(message, file=sys.stderr)
+
+def _watch(args):
+    from watch import watch
+
+    if not os.path.isdir(args.input):
+        print(f"--watch needs a folder, not {args.input}", file=sys.stderr)
+        return 2
+    cache = None
+    if args.cache:
+        from cache import ExtractionCache
+        cache = ExtractionCache(args.cache)
+    try:
+        with _open_output(args) as sink:
+            written, errors = watch(
+                args.input, sink, args.workers, args.backend, cache, args.interval, args.settle,
+                args.include, args.exclude, args.new_only, log=_log,
+            )
+    finally:
+        if cache is not None:
+            cache.close()
+    print(f"Stopped after {written} row(s), {len(errors)} failure(s); "
+          f"saved in {', '.join(sink.paths)}", file=sys.stderr)
+    return 0
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    from sinks import SINKS
+    for path in args.output or []:
+        if path != "-" and os.path.splitext(path)[1].lower() not in SINKS:
+            parser.error(f"unknown output format for {path}; use - or " + ", ".join(SINKS))
+    streamed = args.input == "-" or (args.input.lower().endswith(".zip")
+                                      and os.path.isfile(args.input))
+    if args.input == "-" and not args.name:
+        parser.error("reading from stdin needs --name FILENAME.docx")
+    if args.markers:
+        from Extractor import use_markers
+        try:
+            use_markers(args.markers)
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot use markers {args.markers}: {e}")
+    if streamed and (args.watch or args.cache or args.profile or args.prefetch):
+        parser.error("--watch, --cache, --profile and --prefetch need a .docx file or folder "
+                     "as input")
+    if args.prefetch is not None and (args.prefetch < 1 or args.profile or args.watch):
+        parser.error("--prefetch takes a depth of at least 1 and does not combine with "
+                     "--profile or --watch")
+    if args.watch:
+        return _watch(args)
+    from batch import consume, iter_paths
+
+    started = time.perf_counter()
+    paths = _input_paths(args)
+    workers = args.workers or (1 if len(paths) == 1 else None)
+
+    profiler = None
+    if args.profile:
+        from instrument import Profiler
+        profiler = Profiler(memory=args.profile_memory)
+
+    read_ahead = None
+    if args.prefetch:
+        from prefetch import ReadAhead
+        read_ahead = ReadAhead(args.prefetch, args.prefetch_mb)
+
+    cache = None
+    if args.cache:
+        from cache import ExtractionCache
+        cache = ExtractionCache(args.cache)
+    try:
+        with _open_output(args) as sink:
+            if streamed:
+                results = _stream_results(args, workers)
+            else:
+                results = iter_paths(paths, workers, cache, args.backend, profiler,
+                                     args.timeout, args.max_memory, prefetch=read_ahead)
+            out = profiler.wrap_sink(sink) if profiler else sink
+            _, errors = consume(results, out, log=_log)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if errors:
+        print(f"{len(errors)} file(s) failed:", file=sys.stderr)
+        for file, err in errors:
+            print(f"  {file}: {err}", file=sys.stderr)
+    print(f"Done! Extracted data saved in {', '.join(sink.paths)}", file=sys.stderr)
+    if read_ahead is not None:
+        print(read_ahead.summary(), file=sys.stderr)
+    if profiler is not None:
+        profiler.write(args.profile)
+        print(profiler.summary(args.top), file=sys.stderr)
+        print(f"Run report saved in {args.profile}", file=sys.stderr)
+    if args.timing:
+        done = time.perf_counter()
+        print(
+            f"start-up {1000 * (started - _T0):.1f} ms, "
+            f"extraction {1000 * (done - started):.1f} ms for {len(paths)} file(s)",
+            file=sys.stderr,
+        )
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from functools import partial
+
+from Extractor import (
+    BACKENDS, NO_TITLE, SECTION_COLLECTORS, ParaRecord, ParsedDocument, RunConfig, RunRecord,
+    _title_from_parts, extract_row, jsonld_index, load_document, scan_sections, table_index,
+)
+from batch import _map, list_docx_files
+from cache import file_digest
+from textnorm import clean_heading, norm
+
+# ------------------- Corpus Index -------------------
+# Each document is parsed once into SQLite: its paragraphs (raw text, style,
+# runs, plus normalized and heading forms for queries), table grids, where each
+# section begins and ends, and where its JSON-LD objects sit in the text.
+# Re-running the extractors after a rule change reads these records back as a
+# ParsedDocument instead of unzipping and parsing the XML again.
+#
+# Files are keyed by absolute path, so same-named files in different folders
+# are separate entries. Their extracted title is stored per file, because its
+# fallbacks depend on the filename.
+
+# Bump when SCHEMA changes; an index built under an older schema is discarded
+# and rebuilt by the next `index` run.
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    digest TEXT PRIMARY KEY, indexed TEXT NOT NULL,
+    paragraphs INTEGER NOT NULL, tables INTEGER NOT NULL, has_coverage INTEGER NOT NULL,
+    title_parts TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, name TEXT NOT NULL, size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL REFERENCES documents(digest),
+    title TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paragraphs (
+    digest TEXT NOT NULL, idx INTEGER NOT NULL, text TEXT NOT NULL, style TEXT NOT NULL,
+    runs TEXT NOT NULL, norm TEXT NOT NULL, heading TEXT NOT NULL,
+    PRIMARY KEY (digest, idx)
+);
+CREATE TABLE IF NOT EXISTS tables (
+    digest TEXT NOT NULL, idx INTEGER NOT NULL, grid TEXT NOT NULL,
+    PRIMARY KEY (digest, idx)
+);
+CREATE TABLE IF NOT EXISTS sections (
+    digest TEXT NOT NULL, name TEXT NOT NULL, start INTEGER, stop INTEGER,
+    PRIMARY KEY (digest, name)
+);
+CREATE TABLE IF NOT EXISTS jsonld (
+    digest TEXT NOT NULL, type TEXT NOT NULL, start INTEGER, stop INTEGER, valid INTEGER NOT NULL,
+    PRIMARY KEY (digest, type)
+);
+CREATE INDEX IF NOT EXISTS files_digest ON files(digest);
+CREATE INDEX IF NOT EXISTS files_name ON files(name);
+CREATE INDEX IF NOT EXISTS paragraphs_heading ON paragraphs(heading);
+"""
+
+SECTIONS = tuple(f for f in SECTION_COLLECTORS if f != "text")
+
+def _jsonld_spans(doc, text):
+    index = jsonld_index(doc, text)
+    spans = []
+    for type_name in index.types():
+        raw = index.raw(type_name)
+        start = text.find(raw) if raw else -1
+        spans.append((type_name, start if start >= 0 else None,
+                      start + len(raw) if start >= 0 else None, index.data(type_name) is not None))
+    return spans
+
+def index_record(path, backend=None):
+    """Everything the index stores for one file, as plain data; errors returned, not raised."""
+    try:
+        doc = load_document(path, backend)
+        paragraphs = [(p.text, p.style, [tuple(r) for r in p.runs]) for p in doc.paragraphs]
+        bounds = {}
+        sections = scan_sections(doc, bounds=bounds)
+        return {
+            "paragraphs": paragraphs,
+            "tables": [list(t) for t in doc.tables],
+            "sections": {name: bounds[name] for name in SECTIONS},
+            "title_parts": sections["title"],
+            "jsonld": _jsonld_spans(doc, sections["text"]),
+            "has_coverage": table_index(doc).coverage is not None,
+        }, None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+class CorpusIndex:
+    """SQLite index of parsed documents, keyed by content hash (copies share one entry)."""
+
+    def __init__(self, db_path):
+        self._conn = sqlite3.connect(db_path)
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version != SCHEMA_VERSION:
+            for table in ("files", "documents", "paragraphs", "tables", "sections", "jsonld"):
+                self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    # --- building ---
+    def _stale(self, path):
+        st = os.stat(path)
+        found = self._conn.execute(
+            "SELECT size, mtime_ns FROM files WHERE path = ?", (path,)).fetchone()
+        return found != (st.st_size, st.st_mtime_ns), st
+
+    def add_folder(self, folder, workers=None, backend=None, include=None, exclude=None,
+                   log=print):
+        """Index new and changed .docx files in folder; returns (indexed, errors).
+
+        Files whose size and mtime are unchanged are skipped without being
+        read; changed files are hashed, and contents already in the index
+        (copies, or a file saved back unchanged) are not parsed again. A file
+        that can no longer be read or parsed is dropped from the index, and
+        so are documents no indexed file has any more.
+        """
+        todo, errors = [], []
+        folder = os.path.abspath(folder)
+        names = list_docx_files(folder, include, exclude)
+        if include is None and exclude is None:
+            # forget files that were removed from the folder since the last run
+            present = {os.path.join(folder, n) for n in names}
+            gone = [(p,) for (p,) in self._conn.execute("SELECT path FROM files")
+                    if os.path.dirname(p) == folder and p not in present]
+            self._conn.executemany("DELETE FROM files WHERE path = ?", gone)
+        for name in names:
+            path = os.path.join(folder, name)
+            try:
+                stale, st = self._stale(path)
+                if stale:
+                    todo.append((name, path, st, file_digest(path)))
+            except OSError as e:
+                self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+                errors.append((name, f"{type(e).__name__}: {e}"))
+                log(f"Failed: {name}: {type(e).__name__}: {e}")
+        known = {d for (d,) in self._conn.execute("SELECT digest FROM documents")}
+        parse, queued = [], set()
+        for name, path, st, digest in todo:
+            if digest not in known and digest not in queued:
+                queued.add(digest)
+                parse.append((digest, path))
+
+        indexed = 0
+        results = _map(partial(index_record, backend=backend), [p for _, p in parse],
+                       workers or os.cpu_count() or 1)
+        failed = set()
+        for (digest, path), (record, err) in zip(parse, results):
+            if err is not None:
+                failed.add(digest)
+                errors.append((os.path.basename(path), err))
+                log(f"Failed: {os.path.basename(path)}: {err}")
+                continue
+            self._store(digest, record)
+            indexed += 1
+            log(f"Indexed: {os.path.basename(path)}")
+        for name, path, st, digest in todo:
+            if digest in failed:
+                # its old entry describes contents the file no longer has
+                self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            else:
+                (parts,) = self._conn.execute(
+                    "SELECT title_parts FROM documents WHERE digest = ?", (digest,)).fetchone()
+                title = _title_from_parts(json.loads(parts), os.path.splitext(name)[0])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files (path, name, size, mtime_ns, digest, title)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, name, st.st_size, st.st_mtime_ns, digest, title))
+        self._prune()
+        self._conn.commit()
+        return indexed, errors
+
+    def _prune(self):
+        """Drop documents, and their records, that no file refers to any more."""
+        c = self._conn
+        c.execute("DELETE FROM documents WHERE digest NOT IN (SELECT digest FROM files)")
+        for table in ("paragraphs", "tables", "sections", "jsonld"):
+            c.execute(f"DELETE FROM {table} WHERE digest NOT IN (SELECT digest FROM documents)")
+
+    def _store(self, digest, record):
+        c = self._conn
+        for table in ("paragraphs", "tables", "sections", "jsonld"):
+            c.execute(f"DELETE FROM {table} WHERE digest = ?", (digest,))
+        c.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?)", (
+            digest, datetime.now().isoformat(timespec="seconds"), len(record["paragraphs"]),
+            len(record["tables"]), int(record["has_coverage"]),
+            json.dumps(record["title_parts"], ensure_ascii=False)))
+        c.executemany("INSERT INTO paragraphs VALUES (?, ?, ?, ?, ?, ?, ?)", (
+            (digest, i, text, style, json.dumps(runs, ensure_ascii=False), norm(text),
+             clean_heading(text))
+            for i, (text, style, runs) in enumerate(record["paragraphs"])))
+        c.executemany("INSERT INTO tables VALUES (?, ?, ?)", (
+            (digest, i, json.dumps(grid, ensure_ascii=False))
+            for i, grid in enumerate(record["tables"])))
+        c.executemany("INSERT INTO sections VALUES (?, ?, ?, ?)", (
+            (digest, name, start, stop) for name, (start, stop) in record["sections"].items()))
+        c.executemany("INSERT INTO jsonld VALUES (?, ?, ?, ?, ?)", (
+            (digest, t, start, stop, int(valid)) for t, start, stop, valid in record["jsonld"]))
+
+    # --- reading ---
+    def paths(self):
+        """Indexed file paths, ordered by filename as a folder run would be."""
+        return [p for (p,) in self._conn.execute("SELECT path FROM files ORDER BY name, path")]
+
+    def load(self, path):
+        """The indexed file as a ParsedDocument, ready for any extractor."""
+        found = self._conn.execute("SELECT digest FROM files WHERE path = ?", (path,)).fetchone()
+        if found is None:
+            raise KeyError(path)
+        (digest,) = found
+        paragraphs = [
+            ParaRecord(text, style, tuple(RunRecord(*r) for r in json.loads(runs)))
+            for text, style, runs in self._conn.execute(
+                "SELECT text, style, runs FROM paragraphs WHERE digest = ? ORDER BY idx", (digest,))
+        ]
+        tables = [json.loads(grid) for (grid,) in self._conn.execute(
+            "SELECT grid FROM tables WHERE digest = ? ORDER BY idx", (digest,))]
+        return ParsedDocument(path, paragraphs, tables)
+
+    def iter_rows(self, paths=None):
+        """Yield (filename, row, error) for indexed files, re-extracted from the index."""
+        config = RunConfig()
+        for path in paths or self.paths():
+            name = os.path.basename(path)
+            try:
+                yield name, extract_row(self.load(path), config=config), None
+            except Exception as e:
+                yield name, None, f"{type(e).__name__}: {e}"
+
+    def query(self, sql, params=()):
+        """Run any read query against the index; returns (column names, rows)."""
+        cur = self._conn.execute(sql, params)
+        return [d[0] for d in cur.description or ()], cur.fetchall()
+
+    def missing(self, what):
+        """Paths of files lacking a coverage table, a title, a section or a JSON-LD type.
+
+        A title counts as missing when extraction gives none from any source
+        (heading, table or "Full Report Title:" line); other sections when
+        they never open.
+        """
+        if what == "coverage":
+            sql = ("SELECT f.path FROM files f JOIN documents d USING (digest)"
+                   " WHERE d.has_coverage = 0 ORDER BY f.name, f.path")
+            params = ()
+        elif what == "title":
+            sql = "SELECT path FROM files WHERE title = ? ORDER BY name, path"
+            params = (NO_TITLE,)
+        elif what in SECTIONS:
+            sql = ("SELECT f.path FROM files f LEFT JOIN sections s"
+                   " ON s.digest = f.digest AND s.name = ?"
+                   " WHERE s.start IS NULL ORDER BY f.name, f.path")
+            params = (what,)
+        else:
+            sql = ("SELECT f.path FROM files f LEFT JOIN jsonld j"
+                   " ON j.digest = f.digest AND j.type = ? AND j.valid = 1"
+                   " WHERE j.type IS NULL ORDER BY f.name, f.path")
+            params = (what,)
+        return [n for (n,) in self._conn.execute(sql, params)]
+
+# ------------------- Command Line -------------------
+def build_parser():
+    parser = argparse.ArgumentParser(description="Index parsed reports in SQLite and query them.")
+    parser.add_argument("--db", required=True, help="index database path")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("index", help="parse new or changed files into the index")
+    add.add_argument("input", help="folder of .docx files")
+    add.add_argument("--include", action="append", metavar="GLOB")
+    add.add_argument("--exclude", action="append", metavar="GLOB")
+    add.add_argument("-j", "--workers", type=int, default=None)
+    add.add_argument("--backend", choices=BACKENDS, default=None)
+
+    extract = sub.add_parser("extract", help="re-run the extractors on indexed documents")
+    extract.add_argument("-o", "--output", action="append", metavar="PATH",
+                         help="output .xlsx, .csv, .jsonl or .parquet, or - (default)")
+    extract.add_argument("--max-rows", type=int, default=None)
+    extract.add_argument("--part-columns", type=int, default=None)
+    extract.add_argument("--row-group-size", type=int, default=1000)
+
+    query = sub.add_parser("query", help="list documents missing something, or run SQL")
+    group = query.add_mutually_exclusive_group(required=True)
+    group.add_argument("--missing", metavar="WHAT",
+                       help="coverage, a section (title, description, toc, meta) or a JSON-LD "
+                            "@type such as FAQPage")
+    group.add_argument("--sql", help="a read query over the index tables")
+    return parser
+
+def _log(message):
+    print(message, file=sys.stderr)
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    with CorpusIndex(args.db) as corpus:
+        if args.command == "index":
+            indexed, errors = corpus.add_folder(args.input, args.workers, args.backend,
+                                                args.include, args.exclude, log=_log)
+            print(f"Indexed {indexed} new document(s), {len(errors)} failure(s)", file=sys.stderr)
+            return 1 if errors else 0
+
+        if args.command == "extract":
+            from batch import consume
+            from sinks import DEFAULT_PART_COLUMNS, open_sinks
+            with open_sinks(args.output or ["-"], args.max_rows, args.row_group_size,
+                            args.part_columns or DEFAULT_PART_COLUMNS) as sink:
+                _, errors = consume(corpus.iter_rows(), sink, log=_log)
+            print(f"Done! Extracted data saved in {', '.join(sink.paths)}", file=sys.stderr)
+            return 1 if errors else 0
+
+        if args.missing:
+            for name in corpus.missing(args.missing):
+                print(name)
+            return 0
+        columns, rows = corpus.query(args.sql)
+        print("\t".join(columns))
+        for row in rows:
+            print("\t".join("" if v is None else str(v) for v in row))
+        return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
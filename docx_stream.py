@@ -0,0 +1,249 @@
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+from Extractor import ParaRecord, ParsedDocument, RunRecord
+
+# Streaming backend: reads word/document.xml with iterparse instead of building
+# python-docx's object graph. Records match what load_document() produces with
+# python-docx (same text, style names, run flags and table cell text).
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+REL = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+OFFICE_DOCUMENT = "/officeDocument"
+STYLES = "/styles"
+
+P, R, T, TBL, TR, TC = W + "p", W + "r", W + "t", W + "tbl", W + "tr", W + "tc"
+HYPERLINK, BODY, VAL = W + "hyperlink", W + "body", W + "val"
+
+# Run children that contribute text, as python-docx's Run.text renders them.
+RUN_TEXT = {
+    W + "tab": "\t",
+    W + "ptab": "\t",
+    W + "cr": "\n",
+    W + "noBreakHyphen": "-",
+}
+
+# python-docx reports these built-in styles by their UI names.
+UI_STYLE_NAMES = {"caption": "Caption", "footer": "Footer", "header": "Header"}
+UI_STYLE_NAMES.update({f"heading {i}": f"Heading {i}" for i in range(1, 10)})
+
+def _on(elem):
+    """ST_OnOff toggle such as <w:b/>; a missing element is off."""
+    if elem is None:
+        return False
+    return elem.get(VAL, "true") in ("1", "true", "on")
+
+# ------------------- Package Parts -------------------
+def _rel_target(zf, rels_name, rel_type, base_dir):
+    try:
+        root = ET.fromstring(zf.read(rels_name))
+    except KeyError:
+        return None
+    for rel in root.iter(REL):
+        if rel.get("Type", "").endswith(rel_type) and rel.get("TargetMode") != "External":
+            target = rel.get("Target", "")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join(base_dir, target))
+    return None
+
+def _part_names(zf):
+    """(main document part, styles part) names inside the package."""
+    document = _rel_target(zf, "_rels/.rels", OFFICE_DOCUMENT, "") or "word/document.xml"
+    base, name = posixpath.split(document)
+    styles = _rel_target(zf, posixpath.join(base, "_rels", name + ".rels"), STYLES, base)
+    return document, styles or "word/styles.xml"
+
+def read_paragraph_styles(zf, styles_name):
+    """({styleId: UI name} for paragraph styles, default paragraph style name)."""
+    try:
+        stream = zf.open(styles_name)
+    except KeyError:
+        return {}, ""
+    with stream:
+        return paragraph_styles(_iter_styles(stream))
+
+def _iter_styles(stream):
+    for _, elem in ET.iterparse(stream):
+        if elem.tag == W + "style":
+            yield elem
+            elem.clear()
+
+def paragraph_styles(style_elems):
+    """Paragraph style names from <w:style> elements (ElementTree or lxml).
+
+    Returns ({styleId: UI name}, default paragraph style name), resolved
+    the way python-docx resolves Paragraph.style.
+    """
+    names, default = {}, ""
+    for elem in style_elems:
+        if elem.get(W + "type") == "paragraph":
+            name_elem = elem.find(W + "name")
+            name = name_elem.get(VAL) if name_elem is not None else None
+            name = UI_STYLE_NAMES.get(name, name) or ""
+            names[elem.get(W + "styleId")] = name
+            if _on_attr(elem.get(W + "default")):
+                default = name  # the last default in document order wins
+    return names, default
+
+def _on_attr(value):
+    return value is not None and value in ("1", "true", "on")
+
+# ------------------- Element -> Record -------------------
+def _run_text(r):
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == T:
+            parts.append(child.text or "")
+        elif tag == W + "br":
+            parts.append("\n" if child.get(W + "type", "textWrapping") == "textWrapping" else "")
+        elif tag in RUN_TEXT:
+            parts.append(RUN_TEXT[tag])
+    return "".join(parts)
+
+def _run_record(r):
+    rpr = r.find(W + "rPr")
+    if rpr is None:
+        return RunRecord(_run_text(r), False, False)
+    return RunRecord(_run_text(r), _on(rpr.find(W + "b")), _on(rpr.find(W + "i")))
+
+def _paragraph_text(p):
+    parts = []
+    for child in p:
+        if child.tag == R:
+            parts.append(_run_text(child))
+        elif child.tag == HYPERLINK:
+            parts.extend(_run_text(r) for r in child.findall(R))
+    return "".join(parts)
+
+def paragraph_style(p, styles):
+    """Style name of a <w:p> element, given paragraph_styles() for its document."""
+    names, default = styles
+    style_elem = p.find(f"{W}pPr/{W}pStyle")
+    style_id = style_elem.get(VAL) if style_elem is not None else None
+    return names.get(style_id, default) if style_id else default
+
+def _paragraph_record(p, styles):
+    runs = tuple(_run_record(r) for r in p.findall(R))
+    return ParaRecord(_paragraph_text(p), paragraph_style(p, styles), runs)
+
+def _table_grid(tbl):
+    """Cell text per row, repeating spanned cells the way python-docx's row.cells does."""
+    grid, above = [], {}
+    for tr in tbl.findall(TR):
+        before = tr.find(f"{W}trPr/{W}gridBefore")
+        offset = int(before.get(VAL, "0")) if before is not None else 0
+        row, here = [], {}
+        for tc in tr.findall(TC):
+            tcpr = tc.find(W + "tcPr")
+            span, merge = 1, None
+            if tcpr is not None:
+                span_elem = tcpr.find(W + "gridSpan")
+                if span_elem is not None:
+                    span = int(span_elem.get(VAL, "1"))
+                merge_elem = tcpr.find(W + "vMerge")
+                if merge_elem is not None:
+                    merge = merge_elem.get(VAL, "continue")
+            if merge == "continue":
+                # continuation of a vertical merge: repeat the cell above
+                text, width = above.get(offset, ("", span))
+            else:
+                text = "\n".join(_paragraph_text(p) for p in tc.findall(P))
+                width = span
+            here[offset] = (text, width)
+            row.extend([text] * width)
+            offset += span
+        above = here
+        grid.append(row)
+    return grid
+
+# ------------------- Streaming Reader -------------------
+def iter_blocks(source):
+    """Yield ("p", ParaRecord) and ("tbl", grid) for each body-level block, in order.
+
+    `source` is a path or binary file object. Each block is dropped from the
+    XML tree once it is yielded, and closing the generator early stops reading
+    the package, so callers that only need the first sections never parse the
+    rest of the document.
+    """
+    with zipfile.ZipFile(source) as zf:
+        document_name, styles_name = _part_names(zf)
+        styles = read_paragraph_styles(zf, styles_name)
+        with zf.open(document_name) as stream:
+            depth, body = 0, None
+            for event, elem in ET.iterparse(stream, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if elem.tag == BODY and depth == 2:
+                        body = elem
+                    continue
+                depth -= 1
+                if depth != 2 or body is None:
+                    continue
+                # elem is a direct child of w:body
+                if elem.tag == P:
+                    yield "p", _paragraph_record(elem, styles)
+                elif elem.tag == TBL:
+                    yield "tbl", _table_grid(elem)
+                body.clear()
+
+class _LazyBlocks:
+    """Shared block stream split into paragraph and table sequences on demand."""
+
+    def __init__(self, source):
+        self._blocks = iter_blocks(source)
+        self.items = {"p": [], "tbl": []}
+        self.pull()  # open the package now so a corrupt file fails at load time
+
+    def pull(self):
+        """Read one more block; False once the document is exhausted."""
+        if self._blocks is None:
+            return False
+        try:
+            kind, record = next(self._blocks)
+        except StopIteration:
+            self._blocks = None
+            return False
+        self.items[kind].append(record)
+        return True
+
+    def close(self):
+        if self._blocks is not None:
+            self._blocks.close()
+            self._blocks = None
+
+class LazySequence:
+    """Read-only list view that parses only as far as it is iterated or indexed."""
+
+    def __init__(self, blocks, kind):
+        self._blocks = blocks
+        self._items = blocks.items[kind]
+
+    def __iter__(self):
+        i = 0
+        while True:
+            while i >= len(self._items):
+                if not self._blocks.pull():
+                    return
+            yield self._items[i]
+            i += 1
+
+    def _load_all(self):
+        while self._blocks.pull():
+            pass
+
+    def __len__(self):
+        self._load_all()
+        return len(self._items)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice) or idx < 0 or idx >= len(self._items):
+            self._load_all()
+        return self._items[idx]
+
+def load_streamed(source, name=None):
+    """ParsedDocument whose paragraphs and tables are streamed lazily from the package."""
+    blocks = _LazyBlocks(source)
+    return ParsedDocument(source, LazySequence(blocks, "p"), LazySequence(blocks, "tbl"), name)
@@ -0,0 +1,257 @@
+import csv
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+import Extractor
+
+# ------------------- Instrumentation -------------------
+# Opt-in timing and memory accounting. Nothing is patched until enable() is
+# called, so a normal run pays nothing; once enabled, the functions below are
+# replaced in the Extractor module by wrappers that record wall time, call
+# counts and (optionally) tracemalloc peak allocation against the active
+# FileProfile. Methods are patched on their classes: the collector feeds
+# cover the single-pass section scan, and ReportRecord.as_row the row build.
+
+FUNCTIONS = [
+    "load_document", "extract_content", "build_record", "split_into_excel_cells",
+    "scan_sections", "table_index", "jsonld_index", "extract_report_coverage_table_with_style",
+    "_revenue_forecast",
+    "extract_title", "extract_description", "extract_toc", "extract_meta_description",
+    "extract_seo_title", "extract_breadcrumb_text", "extract_breadcrumb_schema",
+    "extract_faq_schema", "extract_methodology_from_faqschema",
+    "merge_description_and_coverage",
+]
+METHODS = {  # name -> (class, attribute)
+    "title.feed": (Extractor._TitleCollector, "feed"),
+    "description.feed": (Extractor._DescriptionCollector, "feed"),
+    "toc.feed": (Extractor._TocCollector, "feed"),
+    "meta.feed": (Extractor._MetaCollector, "feed"),
+    "text.feed": (Extractor._TextCollector, "feed"),
+    "ReportRecord.as_row": (Extractor.ReportRecord, "as_row"),
+}
+
+_originals = {}
+_active = None  # FileProfile being recorded in this process
+_memory = False
+
+class FileProfile:
+    """Calls, time and allocation per instrumented function for one document."""
+
+    def __init__(self, file):
+        self.file = file
+        self.calls = {}  # name -> [calls, seconds, peak alloc bytes]
+        self.doc = None
+        self.seconds = 0.0
+        self.peak_alloc = None
+        self._stack = []  # [start bytes, peak bytes] of the calls in progress
+
+    def enter(self):
+        if not _memory:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        self._stack.append([current, current])
+
+    def exit(self, name, seconds):
+        entry = self.calls.setdefault(name, [0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += seconds
+        if not _memory:
+            return
+        start, peak = self._stack.pop()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        entry[2] = max(entry[2], peak - start)
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+
+    def as_dict(self):
+        stats = {}
+        if self.doc is not None:
+            paragraphs = list(self.doc.paragraphs)
+            stats = {
+                "paragraphs": len(paragraphs),
+                "tables": len(self.doc.tables),
+                "runs": sum(len(p.runs) for p in paragraphs),
+                "chars": sum(len(p.text) for p in paragraphs),
+            }
+        return {
+            "file": self.file,
+            "seconds": self.seconds,
+            "peak_alloc_bytes": self.peak_alloc,
+            "stats": stats,
+            "calls": {n: {"calls": c, "seconds": s, "peak_alloc_bytes": m if _memory else None}
+                      for n, (c, s, m) in self.calls.items()},
+        }
+
+def _wrap(name, fn):
+    @wraps(fn)
+    def timed(*args, **kwargs):
+        profile = _active
+        if profile is None or (name == "load_document" and isinstance(args[0], Extractor.ParsedDocument)):
+            return fn(*args, **kwargs)
+        profile.enter()
+        t = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            profile.exit(name, time.perf_counter() - t)
+        if name == "load_document" and profile.doc is None:
+            profile.doc = result
+        return result
+    return timed
+
+def enable(memory=False):
+    """Install the timing wrappers (idempotent); memory=True also traces allocations."""
+    global _memory
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if _originals:
+        return
+    for name in FUNCTIONS:
+        _originals[name] = getattr(Extractor, name)
+        setattr(Extractor, name, _wrap(name, _originals[name]))
+    for name, (cls, attr) in METHODS.items():
+        _originals[name] = getattr(cls, attr)
+        setattr(cls, attr, _wrap(name, _originals[name]))
+
+def disable():
+    """Restore the original functions."""
+    for name, fn in _originals.items():
+        if name in METHODS:
+            setattr(*METHODS[name], fn)
+        else:
+            setattr(Extractor, name, fn)
+    _originals.clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+@contextmanager
+def recording(file):
+    """Record everything the instrumented functions do inside the block into a FileProfile."""
+    global _active
+    profile = FileProfile(file)
+    _active = profile
+    if _memory:
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+    t = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.seconds = time.perf_counter() - t
+        if _memory:
+            profile.peak_alloc = tracemalloc.get_traced_memory()[1] - start
+        _active = None
+
+def run_profiled(fn, path, memory=False):
+    """Call fn(path) with instrumentation on; returns (fn's result, profile dict).
+
+    Used as the worker function in batch.iter_paths, so profiles are taken
+    inside the worker processes and shipped back with each result.
+    """
+    enable(memory)
+    with recording(path) as profile:
+        result = fn(path)
+    return result, profile.as_dict()
+
+# ------------------- Run Report -------------------
+class Profiler:
+    """Collects per-file profiles for a run and writes the report."""
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.files = []
+        self.sink_seconds = 0.0
+        self.sink_writes = 0
+
+    def add(self, file, result, profile):
+        profile["file"] = file
+        self.files.append(profile)
+        return result
+
+    def wrap_sink(self, sink):
+        return _TimedSink(sink, self)
+
+    def totals(self):
+        """Per-function totals over the run."""
+        totals = {}
+        for prof in self.files:
+            for name, c in prof["calls"].items():
+                t = totals.setdefault(name, {"calls": 0, "seconds": 0.0, "peak_alloc_bytes": None})
+                t["calls"] += c["calls"]
+                t["seconds"] += c["seconds"]
+                if c["peak_alloc_bytes"] is not None:
+                    t["peak_alloc_bytes"] = max(t["peak_alloc_bytes"] or 0, c["peak_alloc_bytes"])
+        totals["sink.write"] = {"calls": self.sink_writes, "seconds": self.sink_seconds,
+                                "peak_alloc_bytes": None}
+        return dict(sorted(totals.items(), key=lambda kv: -kv[1]["seconds"]))
+
+    def slowest(self, n=10):
+        return sorted(self.files, key=lambda p: -p["seconds"])[:n]
+
+    def report(self):
+        return {
+            "files": len(self.files),
+            "seconds": sum(p["seconds"] for p in self.files),
+            "memory_traced": self.memory,
+            "functions": self.totals(),
+            "documents": self.files,
+        }
+
+    def write(self, path):
+        """Write the report as JSON, or one row per document if path ends in .csv."""
+        if path.lower().endswith(".csv"):
+            names = list(self.totals())
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow(["file", "seconds", "peak_alloc_bytes", "paragraphs", "tables", "runs", "chars"]
+                           + [f"{n} s" for n in names])
+                for p in self.files:
+                    s = p["stats"]
+                    w.writerow([p["file"], f"{p['seconds']:.6f}", p["peak_alloc_bytes"],
+                                s.get("paragraphs"), s.get("tables"), s.get("runs"), s.get("chars")]
+                               + [f"{p['calls'][n]['seconds']:.6f}" if n in p["calls"] else "" for n in names])
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.report(), f, indent=2)
+
+    def summary(self, n=10):
+        """Human-readable top-N slowest documents and the most expensive functions."""
+        lines = [f"Slowest {min(n, len(self.files))} of {len(self.files)} document(s):"]
+        for p in self.slowest(n):
+            s = p["stats"]
+            top = max(p["calls"].items(), key=lambda kv: kv[1]["seconds"], default=("-", {"seconds": 0}))
+            lines.append(
+                f"  {1000 * p['seconds']:9.1f} ms  {p['file']}  "
+                f"({s.get('paragraphs', '?')} paragraphs, {s.get('tables', '?')} tables, "
+                f"{s.get('runs', '?')} runs; most in {top[0]})"
+            )
+        lines.append("Time by function:")
+        for name, t in list(self.totals().items())[:12]:
+            lines.append(f"  {1000 * t['seconds']:9.1f} ms  {t['calls']:>7} calls  {name}")
+        return "\n".join(lines)
+
+class _TimedSink:
+    def __init__(self, sink, profiler):
+        self._sink = sink
+        self._profiler = profiler
+
+    def write(self, row):
+        t = time.perf_counter()
+        self._sink.write(row)
+        self._profiler.sink_seconds += time.perf_counter() - t
+        self._profiler.sink_writes += 1
+
+    def close(self):
+        t = time.perf_counter()
+        self._sink.close()
+        self._profiler.sink_seconds += time.perf_counter() - t
+
+    def __getattr__(self, name):
+        return getattr(self._sink, name)
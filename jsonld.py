@@ -0,0 +1,167 @@
+import json
+import re
+from bisect import bisect_left
+
+# ------------------- JSON-LD Scanner -------------------
+# One linear pass over the document text finds every JSON object. Outside an
+# object, quotes are ordinary prose and ignored; inside, string tokens (with
+# escapes) are skipped whole, so braces in values like "Home {x}" never
+# unbalance the scan. Each top-level block is parsed once and every object in
+# it that carries an "@type" is indexed with both its raw text and parsed value.
+
+TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"?|[{}]', re.S)
+OBJECT_START_RE = re.compile(r'\{\s*["}]')
+TYPE_RE = re.compile(r'"@type"\s*:\s*"([^"\\]*)"')
+
+class _Pass:
+    """Tokenize from one "{" until it closes or the text ends.
+
+    Tokenizing resumed at any "{" token of a pass matches the pass from there
+    on, so later candidates that land on one of its braces reuse its spans
+    instead of scanning the rest of the text again.
+    """
+
+    def __init__(self, text, start):
+        stack, spans = [], []
+        for tok in TOKEN_RE.finditer(text, start):
+            t = tok.group()
+            if t == "{":
+                stack.append(len(spans))
+                spans.append([tok.start(), None])
+            elif t == "}":
+                spans[stack.pop()][1] = tok.end()
+                if not stack:
+                    break
+        self.spans = spans  # [start, end or None while unclosed], by opening brace
+        self.starts = [s for s, _ in spans]
+        self.index = {s: i for i, s in enumerate(self.starts)}
+        self.end = spans[0][1] or len(text)
+
+def scan_objects(text):
+    """Yield (start, end, spans) for each candidate top-level {...} block in text.
+
+    A candidate starts at a "{" followed by a quote or "}", as JSON objects
+    do; braces in ordinary prose are skipped. spans lists (start, end) of
+    every object in the block, outermost first (document order of their
+    opening braces). A block left open at the end of the text runs to the
+    end and has spans None, since it cannot be JSON. Send True into the
+    generator after a block turns out not to be JSON to resume scanning just
+    inside it instead of after it; this also applies to an unclosed block,
+    so a stray '{"' in prose does not hide the objects that follow it.
+    """
+    pos, n = 0, len(text)
+    passes = []  # earlier passes that still reach past pos
+    while True:
+        m = OBJECT_START_RE.search(text, pos)
+        if m is None:
+            return
+        start = m.start()
+        passes = [p for p in passes if p.end > start]
+        for p in passes:
+            i = p.index.get(start)
+            if i is not None:
+                break
+        else:
+            p, i = _Pass(text, start), 0
+            passes.append(p)
+        end = p.spans[i][1]
+        if end is None:
+            end, spans = n, None
+        else:
+            spans = [tuple(s) for s in p.spans[i:bisect_left(p.starts, end, i)]]
+        retry = yield start, end, spans
+        if retry:
+            pos = start + 1
+        elif end >= n:
+            return
+        else:
+            pos = end
+
+def _dicts_preorder(value):
+    """Every dict in a parsed JSON value, in the order their braces appear in the text."""
+    if isinstance(value, dict):
+        yield value
+        for v in value.values():
+            yield from _dicts_preorder(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from _dicts_preorder(v)
+
+def _types(obj):
+    t = obj.get("@type")
+    if isinstance(t, str):
+        return [t]
+    if isinstance(t, list):
+        return [x for x in t if isinstance(x, str)]
+    return []
+
+class JsonLdIndex:
+    """All JSON-LD objects in a text, indexed by "@type" (first occurrence wins).
+
+    >>> index = JsonLdIndex('Prose with a stray {"curly quote '
+    ...     '{"@type": "FAQPage", "mainEntity": []} '
+    ...     '{"@type": "BreadcrumbList", "itemListElement": []}')
+    >>> index.types()
+    ['FAQPage', 'BreadcrumbList']
+    """
+
+    def __init__(self, text):
+        self.blocks = []   # (start, end, parsed or None) for each top-level block
+        self._by_type = {}
+        malformed = {}
+        tail = (len(text) + 1, None)  # (search start, first "@type" match from there)
+        scan = scan_objects(text)
+        found = next(scan, None)
+        while found is not None:
+            start, end, spans = found
+            if spans is None:
+                # Unclosed, so never JSON; the "@type" search runs to the end of
+                # the text and is shared by the stray braces that follow.
+                parsed = None
+                if tail[0] > start or (tail[1] and tail[1].start() < start):
+                    tail = start, TYPE_RE.search(text, start)
+                m = tail[1]
+            else:
+                raw = text[start:end].strip()
+                parsed = _loads(raw)
+                m = None if parsed is not None else TYPE_RE.search(text, start, end)
+            self.blocks.append((start, end, parsed))
+            if parsed is not None:
+                self._index_block(text, spans, raw, parsed)
+            elif m and m.group(1) not in malformed:
+                # Not JSON: remember its first "@type" as a last resort, then
+                # look for well-formed objects inside it.
+                malformed[m.group(1)] = (text[start:end].strip(), None)
+            try:
+                found = scan.send(parsed is None)
+            except StopIteration:
+                found = None
+        for type_name, entry in malformed.items():
+            self._by_type.setdefault(type_name, entry)
+
+    def _index_block(self, text, spans, raw, parsed):
+        dicts = list(_dicts_preorder(parsed))
+        if len(dicts) == len(spans):
+            for (s, e), obj in zip(spans, dicts):
+                for t in _types(obj):
+                    self._by_type.setdefault(t, (text[s:e].strip(), obj))
+        elif isinstance(parsed, dict):
+            for t in _types(parsed):
+                self._by_type.setdefault(t, (raw, parsed))
+
+    def types(self):
+        return list(self._by_type)
+
+    def raw(self, type_name):
+        """Source text of the first object of this type, or ""."""
+        return self._by_type.get(type_name, ("", None))[0]
+
+    def data(self, type_name):
+        """Parsed object of the first object of this type, or None if absent or malformed."""
+        return self._by_type.get(type_name, ("", None))[1]
+
+def _loads(raw):
+    try:
+        return json.loads(raw)
+    except (ValueError, RecursionError):  # deeply nested input exhausts the decoder's stack
+        return None
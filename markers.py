@@ -0,0 +1,120 @@
+import hashlib
+import html
+import json
+import re
+
+# ------------------- Section Markers -------------------
+# The phrases that open and close each paragraph section belong to the report
+# template, not the code: a MarkerSet holds them and can be loaded from JSON,
+# e.g. {"headings": [...], "description_end": "...", "toc_start": [...]}.
+#
+# Each group is compiled once into a MarkerMatcher that reports every marker
+# present in a text in one call. In CPython a str `in` test is a C-level
+# substring search, faster per marker than a combined regex alternation or an
+# Aho-Corasick pass at these set sizes (benchmark.py --markers measures all
+# three), so that is the engine. The win is in what gets scanned: the
+# description headings are matched against clean_heading(), which costs far
+# more than the search on long body paragraphs, so the matcher first checks
+# that all the words of some marker occur in the plain lower-cased text and
+# only builds the heading form when one does.
+
+WHITESPACE_RE = re.compile(r"\s+")
+MARKER_GROUPS = ("headings", "description_end", "toc_start", "toc_end", "meta_start")
+
+# clean_heading() drops "Section N:" anywhere, which can join two halves of a
+# word; its regex is case-insensitive, so "section" may also be spelt with
+# these characters (long s, dotless i, or the dot that İ leaves when lowered).
+_SECTION_SPELLINGS = ("section", "ſ", "ı", "̇")
+
+class MarkerMatcher:
+    """Every marker of a group found in a text, in the group's order."""
+
+    def __init__(self, markers):
+        self.markers = tuple(markers)
+        self.shortest = min((len(m) for m in self.markers), default=0)
+        # a marker's words, longest (most telling) first, for the pre-check
+        words = [tuple(sorted(set(WHITESPACE_RE.split(m.strip())), key=len, reverse=True))
+                 for m in self.markers]
+        # words are only a safe pre-check when lower-casing cannot change their length
+        self.words = tuple(dict.fromkeys(words)) if all(
+            w.isascii() for ws in words for w in ws) else None
+
+    def hits(self, text):
+        if len(text) < self.shortest:
+            return ()
+        return tuple(m for m in self.markers if m in text)
+
+    def may_hit(self, low):
+        """False only when no marker can be in clean_heading() of a text whose lower() is low."""
+        if self.words is None:
+            return True
+        for first, *rest in self.words:
+            if first in low and all(w in low for w in rest):
+                return True
+        return any(s in low for s in _SECTION_SPELLINGS)
+
+def _as_tuple(value):
+    values = (value,) if isinstance(value, str) else tuple(value)
+    markers = tuple(v.strip().lower() for v in values)
+    if not markers or not all(markers):
+        raise ValueError("every marker group needs at least one non-empty marker")
+    return markers
+
+class MarkerSet:
+    """The section markers of one report template, compiled for matching.
+
+    `headings` are the description section headings (their order picks the
+    heading when a paragraph holds several, and gives the <h2> text);
+    `description_end` closes the description; `toc_start`/`toc_end` open
+    the table of contents and mark its last part; `meta_start` precedes the
+    meta description. Markers are matched lower-cased, as substrings.
+    """
+
+    def __init__(self, headings, description_end, toc_start, toc_end, meta_start):
+        self.headings = _as_tuple(headings)
+        self.description_end = _as_tuple(description_end)
+        self.toc_start = _as_tuple(toc_start)
+        self.toc_end = _as_tuple(toc_end)
+        self.meta_start = _as_tuple(meta_start)
+        self.heading_html = {h: f"<h2>{html.escape(h.title(), quote=False)}</h2>"
+                             for h in self.headings}
+        self.description = MarkerMatcher(self.headings + self.description_end)
+        self.toc_open = MarkerMatcher(self.toc_start)
+        self.toc_close = MarkerMatcher(self.toc_end)
+        self.meta_open = MarkerMatcher(self.meta_start)
+
+    def to_dict(self):
+        return {g: list(getattr(self, g)) for g in MARKER_GROUPS}
+
+    @property
+    def fingerprint(self):
+        """Short digest of the markers, for telling cached results of templates apart."""
+        data = json.dumps(self.to_dict(), sort_keys=True).encode("utf-8")
+        return hashlib.sha256(data).hexdigest()[:12]
+
+    def __eq__(self, other):
+        return isinstance(other, MarkerSet) and self.to_dict() == other.to_dict()
+
+    def __hash__(self):
+        return hash(self.fingerprint)
+
+    def __reduce__(self):
+        return (MarkerSet, tuple(getattr(self, g) for g in MARKER_GROUPS))
+
+    @classmethod
+    def from_dict(cls, data, base=None):
+        """A MarkerSet from a dict; groups it leaves out are taken from `base`."""
+        unknown = set(data) - set(MARKER_GROUPS)
+        if unknown:
+            raise ValueError(f"unknown marker group(s) {sorted(unknown)}, expected {MARKER_GROUPS}")
+        groups = base.to_dict() if base is not None else {}
+        groups.update(data)
+        missing = [g for g in MARKER_GROUPS if g not in groups]
+        if missing:
+            raise ValueError(f"marker group(s) {missing} missing")
+        return cls(*(groups[g] for g in MARKER_GROUPS))
+
+def load_markers(path, base=None):
+    """Read a MarkerSet from a JSON template file (see MarkerSet.from_dict)."""
+    with open(path, encoding="utf-8") as f:
+        return MarkerSet.from_dict(json.load(f), base)
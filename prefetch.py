@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# ------------------- Read-ahead -------------------
+# On network shares opening and reading a .docx can take as long as parsing
+# it. ReadAhead reads the next files' bytes on a few threads while the current
+# one is being extracted, so the two overlap instead of alternating. The bytes
+# go to the extractors unchanged (Extractor.load_document takes bytes).
+#
+# Memory is granted to reads strictly in input order: a file may only start
+# reading once everything before it has its share, so the file the consumer
+# needs next can never be starved by later ones, and a single file larger
+# than the whole budget is still read once nothing else is held. Callers that
+# pass the bytes on to worker processes hold them until the result is back
+# (iter(hold=True) with release()), so the budget also covers files in flight.
+
+class ReadAhead:
+    """Read files ahead of their consumer on a small thread pool.
+
+    At most `depth` files are being read or waiting to be consumed, holding
+    at most `max_mb` MB between them and any files handed out but not yet
+    released. Timings are collected as it runs:
+    `stall_seconds` is how long the consumer waited for bytes (I/O-bound),
+    `busy_seconds` how long it spent between items, i.e. extracting
+    (CPU-bound), and `read_seconds` the time spent in reads summed over the
+    threads.
+    """
+
+    def __init__(self, depth=4, max_mb=256, threads=None):
+        if depth < 1:
+            raise ValueError(f"read-ahead depth must be at least 1, not {depth}")
+        self.depth = depth
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.threads = threads or min(depth, 4)
+        self.files = 0
+        self.bytes = 0
+        self.peak_bytes = 0
+        self.read_seconds = 0.0
+        self.stall_seconds = 0.0
+        self.busy_seconds = 0.0
+        self._held = 0
+        self._turn = 0
+        self._handed = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _read(self, turn, path):
+        """(bytes, None) or (None, OSError) for one file, once it is granted memory."""
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            size = 0
+        with self._cond:
+            while not self._closed and (
+                    self._turn != turn or (self._held and self._held + size > self.max_bytes)):
+                self._cond.wait()
+            if self._closed:
+                return None, None  # the consumer stopped early; nobody wants these bytes
+            self._turn += 1
+            self._held += size
+            self.peak_bytes = max(self.peak_bytes, self._held)
+            self._cond.notify_all()
+        started = time.perf_counter()
+        try:
+            with open(path, "rb") as f:
+                data, err = f.read(), None
+        except OSError as e:
+            data, err = None, e
+        with self._cond:
+            self.read_seconds += time.perf_counter() - started
+            # the file may have changed since the stat; hold what was actually read
+            self._held += (len(data) if data is not None else 0) - size
+        return data, err
+
+    def release(self, data):
+        """Stop counting bytes handed out by iter(hold=True) against the budget."""
+        if data:
+            with self._cond:
+                self._held -= len(data)
+                self._cond.notify_all()
+
+    def ready(self):
+        """True when taking the next item cannot wait on bytes only release() frees.
+
+        That is, the next file has been granted its memory or nothing is held.
+        """
+        with self._cond:
+            return self._turn > self._handed or not self._held
+
+    def iter(self, paths, hold=False):
+        """Yield (path, bytes, None) or (path, None, OSError) for each path, in order.
+
+        An item's bytes count against the budget until the next item is
+        asked for, or with `hold` until they are passed to release(). A
+        holding consumer must not wait for the next item while it alone
+        would release the memory that item needs (see ready()).
+        """
+        paths = iter(paths)
+        with self._cond:
+            self._held, self._turn, self._handed, self._closed = 0, 0, 0, False
+        pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="read-ahead")
+        pending = deque()
+        submitted = 0
+        try:
+            for path in paths:
+                pending.append((path, pool.submit(self._read, submitted, path)))
+                submitted += 1
+                if len(pending) >= self.depth:
+                    yield from self._take(pending, hold)
+            while pending:
+                yield from self._take(pending, hold)
+        finally:
+            with self._cond:
+                self._closed = True  # wake any read still waiting for memory so the threads end
+                self._cond.notify_all()
+            for _, future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+    def _take(self, pending, hold):
+        path, future = pending.popleft()
+        started = time.perf_counter()
+        data, err = future.result()
+        handed = time.perf_counter()
+        self.stall_seconds += handed - started
+        self.files += 1
+        with self._cond:
+            self._handed += 1
+        self.bytes += len(data) if data is not None else 0
+        try:
+            yield path, data, err
+        finally:
+            self.busy_seconds += time.perf_counter() - handed
+            if not hold:
+                self.release(data)
+
+    def summary(self):
+        """One-paragraph report of where the consumer's time went."""
+        total = self.stall_seconds + self.busy_seconds
+        share = 100 * self.stall_seconds / total if total else 0.0
+        rate = self.bytes / (1024 * 1024) / self.read_seconds if self.read_seconds else 0.0
+        return (f"read-ahead: {self.files} file(s), {self.bytes / (1024 * 1024):.1f} MB; "
+                f"stalled on I/O {self.stall_seconds:.2f} s ({share:.0f}%), "
+                f"busy extracting {self.busy_seconds:.2f} s; "
+                f"reads {self.read_seconds:.2f} s on {self.threads} thread(s) ({rate:.1f} MB/s), "
+                f"peak {self.peak_bytes / (1024 * 1024):.1f} MB held")
@@ -0,0 +1,353 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from Extractor import BACKENDS, ROW_COLUMNS, RunConfig, use_markers
+from batch import list_zip_members, process_blob, start_pool, warm_up
+
+# ------------------- HTTP Service -------------------
+# A small HTTP/1.1 server on asyncio streams, so it needs nothing beyond the
+# standard library and runs offline. The event loop only parses requests and
+# writes responses; every document is parsed on a process pool that is started
+# and warmed (parser stack imported) before the port opens. A worker that dies
+# mid-document breaks the whole pool; the request gets 500, the pool is
+# replaced and re-warmed, and /health answers 503 until it is ready again.
+#
+#   POST /extract?name=Report.docx   body: the .docx bytes      -> one JSON row
+#   POST /batch                      body: a .zip of .docx files -> rows and errors
+#   GET  /metrics                    counters, latency percentiles, throughput
+#   GET  /health
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 422: "Unprocessable Entity",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+LATENCY_WINDOW = 1000  # documents kept for the latency percentiles
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _row_json(row):
+    return {c: row.get(c, "") for c in ROW_COLUMNS}  # the same fields as a .jsonl run
+
+def _percentiles(samples):
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1], 1)}
+
+class Metrics:
+    """Request and document counters with a rolling window of latencies (ms)."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.documents = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.request_ms = deque(maxlen=LATENCY_WINDOW)
+        self.extract_ms = deque(maxlen=LATENCY_WINDOW)
+        self._finished = deque(maxlen=LATENCY_WINDOW)  # monotonic finish times
+
+    def document(self, seconds, ok):
+        self.documents += 1
+        self.failed += not ok
+        self.extract_ms.append(1000 * seconds)
+        self._finished.append(time.monotonic())
+
+    def snapshot(self):
+        now = time.monotonic()
+        uptime = now - self.started
+        recent = [t for t in self._finished if now - t <= 60]
+        return {
+            "uptime_seconds": round(uptime, 1),
+            "requests": self.requests,
+            "documents": self.documents,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "documents_per_second": round(self.documents / uptime, 2) if uptime else 0.0,
+            "documents_per_second_1m": round(len(recent) / min(60.0, uptime), 2) if uptime else 0.0,
+            "request_ms": _percentiles(self.request_ms),
+            "extract_ms": _percentiles(self.extract_ms),
+        }
+
+class ExtractionService:
+    """Serve extraction over HTTP from a warm process pool.
+
+    At most `workers` documents are parsed at once; up to `max_pending`
+    (default 4 per worker) may be admitted, and anything beyond that is
+    turned away with 503 rather than queued without bound. Bodies larger than
+    `max_body_mb` get 413. With no `config`, each request uses a fresh
+    RunConfig so a long-running service follows the calendar.
+    """
+
+    def __init__(self, workers=None, backend=None, max_pending=None, max_body_mb=50, config=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.backend = backend
+        self.max_pending = max_pending or self.workers * 4
+        self.max_body = int(max_body_mb * 1024 * 1024)
+        self.config = config
+        self.metrics = Metrics()
+        self.restarts = 0
+        self.broken = None  # why the pool is down, until its replacement is warm
+        self._pool = None
+        self._warming = None
+        self._slots = None
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """Start and warm the workers, then listen; returns the asyncio server."""
+        self._pool = self._new_pool()
+        await self._warm_pool(self._pool)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._warming is not None:
+            self._warming.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    # ---- workers ----
+    def _new_pool(self):
+        return start_pool(self.workers, self.backend)
+
+    async def _warm_pool(self, pool):
+        # warm_up blocks until the workers answer, so wait for it on a thread
+        await asyncio.get_running_loop().run_in_executor(None, warm_up, pool, self.workers)
+
+    async def _rewarm(self, pool):
+        try:
+            await self._warm_pool(pool)
+        except BrokenProcessPool:
+            return  # still broken; the next request replaces it again
+        if pool is self._pool:
+            self.broken = None
+
+    def _replace_pool(self, pool, reason):
+        """Swap a broken pool for a fresh one, once however many requests saw it break."""
+        if pool is not self._pool:
+            return
+        self.broken = reason
+        self.restarts += 1
+        pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._new_pool()
+        self._warming = asyncio.ensure_future(self._rewarm(self._pool))
+
+    # ---- documents ----
+    def _admit(self, n):
+        # an idle service takes any batch, however large, so no batch is refused forever
+        if self.metrics.in_flight and self.metrics.in_flight + n > self.max_pending:
+            self.metrics.rejected += 1
+            raise HttpError(503, f"busy: {self.metrics.in_flight} document(s) in flight")
+        self.metrics.in_flight += n
+
+    async def _extract(self, name, data, config):
+        """(row, error) for one document, parsed on the pool; 500 if its worker died."""
+        loop = asyncio.get_running_loop()
+        try:
+            async with self._slots:
+                started = time.perf_counter()
+                pool = self._pool
+                try:
+                    row, err = await loop.run_in_executor(
+                        pool, partial(process_blob, backend=self.backend, config=config),
+                        (name, data))
+                except BrokenProcessPool as e:
+                    self.metrics.document(time.perf_counter() - started, False)
+                    self._replace_pool(pool, f"{type(e).__name__}: {e}")
+                    raise HttpError(500, f"a worker died while parsing {name}; "
+                                         "the pool is being restarted") from None
+                self.metrics.document(time.perf_counter() - started, err is None)
+        finally:
+            self.metrics.in_flight -= 1
+        return row, err
+
+    async def extract(self, name, data):
+        if not name:
+            raise HttpError(400, "give the filename as ?name=Report.docx or an X-Filename header")
+        self._admit(1)
+        row, err = await self._extract(name, data, self.config or RunConfig())
+        if err is not None:
+            raise HttpError(422, err)
+        return _row_json(row)
+
+    async def batch(self, data):
+        try:
+            members = list_zip_members(data)
+        except zipfile.BadZipFile as e:
+            raise HttpError(400, f"batch body must be a .zip of .docx files: {e}") from None
+        # read every member before admitting any, so a member that cannot be read
+        # (bad CRC, encrypted, unsupported compression) never holds a slot
+        docs, errors = [], []
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            for m in members:
+                name = m.rsplit("/", 1)[-1]
+                try:
+                    docs.append((name, archive.read(m)))
+                except Exception as e:
+                    errors.append({"file": name, "error": f"{type(e).__name__}: {e}"})
+        self._admit(len(docs))
+        config = self.config or RunConfig()
+        results = await asyncio.gather(
+            *(self._extract(name, blob, config) for name, blob in docs), return_exceptions=True)
+        rows = []
+        for (name, _), result in zip(docs, results):
+            if isinstance(result, HttpError) and result.status == 500:
+                result = None, str(result)  # one crashed document does not fail the batch
+            elif isinstance(result, BaseException):
+                raise result
+            row, err = result
+            if err is None:
+                rows.append(_row_json(row))
+            else:
+                errors.append({"file": name, "error": err})
+        return {"rows": rows, "errors": errors}
+
+    # ---- HTTP ----
+    async def _route(self, method, target, headers, body):
+        url = urlsplit(target)
+        if url.path == "/health":
+            if self.broken is not None:
+                raise HttpError(503, f"worker pool broken ({self.broken}); restarting")
+            return {"status": "ok", "workers": self.workers, "restarts": self.restarts}
+        if url.path == "/metrics":
+            return self.metrics.snapshot()
+        if url.path not in ("/extract", "/batch"):
+            raise HttpError(404, f"no such endpoint: {url.path}")
+        if method != "POST":
+            raise HttpError(405, f"{url.path} takes POST")
+        if url.path == "/batch":
+            return await self.batch(body)
+        name = parse_qs(url.query).get("name", [headers.get("x-filename")])[0]
+        return await self.extract(unquote(name) if name else name, body)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break  # client closed the connection
+                started = time.perf_counter()
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "malformed request line"}, False)
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version == "HTTP/1.1")
+                self.metrics.requests += 1
+                try:
+                    body = await self._read_body(method, headers, reader)
+                    status, payload = 200, await self._route(method, target, headers, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                    keep_alive = keep_alive and e.status not in (400, 411, 413)  # body may be unread
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                    keep_alive = False
+                await self._respond(writer, status, payload, keep_alive)
+                if urlsplit(target).path in ("/extract", "/batch"):
+                    self.metrics.request_ms.append(1000 * (time.perf_counter() - started))
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            # Send FIN explicitly: workers forked for a replacement pool inherit
+            # open client sockets, so close() alone would not end the connection.
+            try:
+                writer.write_eof()
+            except (OSError, RuntimeError):
+                pass
+            writer.close()
+
+    async def _read_body(self, method, headers, reader):
+        if method != "POST":
+            return b""
+        if "content-length" not in headers:
+            raise HttpError(411, "send the document with a Content-Length")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HttpError(400, "Content-Length must be a number") from None
+        if length > self.max_body:
+            raise HttpError(413, f"body of {length} bytes is over the {self.max_body} byte limit")
+        return await reader.readexactly(length)
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {REASONS[status]}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 503:
+            head.append("Retry-After: 1")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+async def serve(host="127.0.0.1", port=8765, log=print, **options):
+    """Run an ExtractionService until cancelled; options go to ExtractionService."""
+    service = ExtractionService(**options)
+    server = await service.start(host, port)
+    log(f"Serving on http://{host}:{port} with {service.workers} warm worker(s)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+# ------------------- Command Line -------------------
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve report extraction over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port (default: 8765)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--backend", choices=BACKENDS, default=None)
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="documents admitted at once before answering 503 (default: 4 per worker)")
+    parser.add_argument("--max-body", type=float, default=50, metavar="MB",
+                        help="largest accepted upload (default: 50)")
+    parser.add_argument("--markers", metavar="JSON", help="section markers of the report template")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.markers:
+        use_markers(args.markers)  # before the pool starts, so the workers see it too
+    log = partial(print, file=sys.stderr)
+    try:
+        asyncio.run(serve(args.host, args.port, log, workers=args.workers, backend=args.backend,
+                          max_pending=args.max_pending, max_body_mb=args.max_body))
+    except KeyboardInterrupt:
+        log("Stopped")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
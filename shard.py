@@ -0,0 +1,237 @@
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import sys
+from datetime import datetime
+
+from Extractor import BACKENDS, content_version, use_markers
+from batch import iter_paths, list_docx_files
+from cache import file_digest
+
+# ------------------- Sharding -------------------
+# A shard is fixed by (index, count, method) and the folder listing alone, so
+# every node computes the same split without talking to the others. "hash"
+# assigns each filename by a digest of its name (adding files elsewhere in the
+# folder never moves a file to another shard); "range" cuts the sorted listing
+# into contiguous, near-equal slices.
+
+SHARD_METHODS = ("hash", "range")
+
+def shard_of(filename, count):
+    """1-based hash shard of a filename."""
+    digest = hashlib.sha1(filename.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+def select_shard(files, index, count, method="hash"):
+    """The files (sorted listing order kept) that belong to shard `index` of `count`."""
+    if not 1 <= index <= count:
+        raise ValueError(f"shard index must be between 1 and {count}, not {index}")
+    if method == "hash":
+        return [f for f in files if shard_of(f, count) == index]
+    if method == "range":
+        n = len(files)
+        return files[(index - 1) * n // count:index * n // count]
+    raise ValueError(f"unknown shard method {method!r}, expected one of {SHARD_METHODS}")
+
+def parse_shard(spec):
+    """"K/N" -> (K, N)."""
+    try:
+        index, count = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N such as 2/8, not {spec!r}") from None
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {spec} is out of range")
+    return index, count
+
+def _stem(index, count):
+    return f"shard-{index}-of-{count}"
+
+# ------------------- Shard Run -------------------
+def run_shard(folder, out_dir, index, count, method="hash", workers=None, cache=None,
+              backend=None, include=None, exclude=None, timeout=None, max_memory=None,
+              log=print):
+    """Extract one shard of folder into out_dir; returns the manifest path.
+
+    Writes shard-K-of-N.jsonl (one full row per line, in listing order) and
+    shard-K-of-N.manifest.json listing every file of the shard with its
+    sha256 (null if it could not be read) and either "ok" or the error. The
+    manifest is written last, so its presence means the shard finished.
+    timeout/max_memory bound each document as in batch.iter_paths.
+    """
+    files = select_shard(list_docx_files(folder, include, exclude), index, count, method)
+    os.makedirs(out_dir, exist_ok=True)
+    stem = _stem(index, count)
+    rows_path = os.path.join(out_dir, stem + ".jsonl")
+    manifest_path = os.path.join(out_dir, stem + ".manifest.json")
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)  # a stale manifest must not vouch for a new partial
+
+    paths = [os.path.join(folder, f) for f in files]
+    entries, digests = [], {}
+    results = iter_paths(paths, workers, cache, backend, timeout=timeout, max_memory=max_memory,
+                         digests=digests)
+    with open(rows_path, "w", encoding="utf-8") as out:
+        for path, (file, row, err) in zip(paths, results):
+            digest = digests.get(path)
+            if digest is None and err is not None:
+                # no read to take it from (e.g. the worker was killed): hash the file now
+                try:
+                    digest = file_digest(path)
+                except OSError:
+                    pass
+            entry = {"file": file, "sha256": digest, "status": "ok"}
+            if err is None:
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                log(f"Processing: {file}")
+            else:
+                entry.update(status="error", error=err)
+                log(f"Failed: {file}: {err}")
+            entries.append(entry)
+
+    manifest = {
+        "shard": index,
+        "shards": count,
+        "method": method,
+        "folder": os.path.abspath(folder),
+        "include": include,
+        "exclude": exclude,
+        "extractor_version": content_version(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "rows": os.path.basename(rows_path),
+        "rows_sha256": file_digest(rows_path),
+        "files": entries,
+    }
+    tmp = manifest_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, manifest_path)
+    return manifest_path
+
+# ------------------- Merge -------------------
+def load_manifests(shard_dir):
+    """Every shard manifest in shard_dir, checked to form one complete, consistent run."""
+    manifests = []
+    for name in sorted(os.listdir(shard_dir)):
+        if name.endswith(".manifest.json"):
+            with open(os.path.join(shard_dir, name), encoding="utf-8") as f:
+                manifests.append(json.load(f))
+    if not manifests:
+        raise ValueError(f"no shard manifests in {shard_dir}")
+
+    first = manifests[0]
+    for key in ("shards", "method", "extractor_version", "include", "exclude"):
+        values = {json.dumps(m.get(key)) for m in manifests}
+        if len(values) > 1:
+            raise ValueError(f"shard manifests disagree on {key}: {', '.join(sorted(values))}")
+    count = first["shards"]
+    seen = sorted(m["shard"] for m in manifests)
+    if seen != list(range(1, count + 1)):
+        missing = sorted(set(range(1, count + 1)) - set(seen))
+        raise ValueError(f"incomplete shard set: missing {missing or 'none'}, found {seen}")
+
+    for m in manifests:
+        rows_path = os.path.join(shard_dir, m["rows"])
+        if file_digest(rows_path) != m["rows_sha256"]:
+            raise ValueError(f"{m['rows']} does not match its manifest")
+    return sorted(manifests, key=lambda m: m["shard"])
+
+def _shard_rows(shard_dir, manifest):
+    ok = [e["file"] for e in manifest["files"] if e["status"] == "ok"]
+    with open(os.path.join(shard_dir, manifest["rows"]), encoding="utf-8") as f:
+        rows = (json.loads(line) for line in f)
+        for file, row in zip(ok, rows):
+            if row.get("File") != file:
+                raise ValueError(f"{manifest['rows']}: expected a row for {file}, got {row.get('File')}")
+            yield file, row
+
+def merge_shards(shard_dir, sink, log=print):
+    """Write every shard's rows to sink in single-node order; returns (rows written, errors).
+
+    Each partial is already in listing order, so a k-way merge on the
+    filename reproduces the sorted folder listing without loading the
+    shards into memory. errors lists (filename, message) from the manifests.
+    """
+    manifests = load_manifests(shard_dir)
+    streams = [_shard_rows(shard_dir, m) for m in manifests]
+    written = 0
+    for file, row in heapq.merge(*streams, key=lambda item: item[0]):
+        sink.write(row)
+        written += 1
+    errors = sorted((e["file"], e["error"]) for m in manifests for e in m["files"]
+                    if e["status"] == "error")
+    total = sum(len(m["files"]) for m in manifests)
+    log(f"Merged {len(manifests)} shard(s): {written} row(s) from {total} file(s)")
+    return written, errors
+
+# ------------------- Command Line -------------------
+def build_parser():
+    parser = argparse.ArgumentParser(description="Split an extraction run across machines.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="extract one shard of a folder")
+    run.add_argument("input", help="folder of .docx files (the same listing on every node)")
+    run.add_argument("--shard", type=parse_shard, required=True, metavar="K/N",
+                     help="process shard K of N (1-based)")
+    run.add_argument("--method", choices=SHARD_METHODS, default="hash",
+                     help="split by filename hash (default) or by ranges of the sorted listing")
+    run.add_argument("--out-dir", required=True, help="where the partial rows and manifest go")
+    run.add_argument("--include", action="append", metavar="GLOB")
+    run.add_argument("--exclude", action="append", metavar="GLOB")
+    run.add_argument("-j", "--workers", type=int, default=None)
+    run.add_argument("--backend", choices=BACKENDS, default=None)
+    run.add_argument("--cache", metavar="PATH", help="SQLite extraction cache")
+    run.add_argument("--timeout", type=float, default=None, metavar="SECONDS")
+    run.add_argument("--max-memory", type=float, default=None, metavar="MB")
+    run.add_argument("--markers", metavar="JSON", help="section markers of the report template")
+
+    merge = sub.add_parser("merge", help="combine finished shards into the final output")
+    merge.add_argument("shard_dir", help="folder holding every shard's rows and manifest")
+    merge.add_argument("-o", "--output", action="append", metavar="PATH", required=True,
+                       help="output .xlsx, .csv, .jsonl or .parquet (repeatable)")
+    merge.add_argument("--max-rows", type=int, default=None)
+    merge.add_argument("--part-columns", type=int, default=None)
+    merge.add_argument("--row-group-size", type=int, default=1000)
+    return parser
+
+def _log(message):
+    print(message, file=sys.stderr)
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "run":
+        if args.markers:
+            use_markers(args.markers)
+        cache = None
+        if args.cache:
+            from cache import ExtractionCache
+            cache = ExtractionCache(args.cache)
+        try:
+            index, count = args.shard
+            path = run_shard(args.input, args.out_dir, index, count, args.method, args.workers,
+                             cache, args.backend, args.include, args.exclude, args.timeout,
+                             args.max_memory, log=_log)
+        finally:
+            if cache is not None:
+                cache.close()
+        print(f"Shard {index}/{count} done; manifest saved in {path}", file=sys.stderr)
+        return 0
+
+    from sinks import DEFAULT_PART_COLUMNS, open_sinks
+    try:
+        with open_sinks(args.output, args.max_rows, args.row_group_size,
+                        args.part_columns or DEFAULT_PART_COLUMNS) as sink:
+            _, errors = merge_shards(args.shard_dir, sink, log=_log)
+    except (OSError, ValueError) as e:
+        print(f"Cannot merge: {e}", file=sys.stderr)
+        return 2
+    if errors:
+        print(f"{len(errors)} file(s) failed:", file=sys.stderr)
+        for file, err in errors:
+            print(f"  {file}: {err}", file=sys.stderr)
+    print(f"Done! Extracted data saved in {', '.join(sink.paths)}", file=sys.stderr)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
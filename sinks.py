@@ -0,0 +1,308 @@
+import csv
+import json
+import os
+import sys
+
+from Extractor import ROW_COLUMNS, PART_PREFIX
+
+EXCEL_MAX_ROWS = 1048575  # data rows per sheet, header excluded
+# Discription_Part columns declared up front: ten cells hold ~320k characters of
+# description HTML, well past the longest reports, so the header never has to grow.
+DEFAULT_PART_COLUMNS = 10
+
+def part_count(row):
+    """Number of Discription_Part{i} columns present in a row."""
+    n = 0
+    while f"{PART_PREFIX}{n + 1}" in row:
+        n += 1
+    return n
+
+# ------------------- Streaming Excel Sink -------------------
+class ExcelSink:
+    """Write-only Excel output that streams rows instead of holding a DataFrame.
+
+    Rows are appended one at a time to an openpyxl write-only sheet, which
+    spools to disk, so memory stays flat however many files are processed.
+    The header holds ROW_COLUMNS plus `part_columns` Discription_Part columns.
+    A write-only sheet cannot rewrite its header, so a row with more parts
+    than that starts a new sheet/workbook whose header is widened to fit;
+    size `part_columns` so this does not happen.
+
+    Output rolls over to a new workbook (`rollover="workbook"`, saved as
+    name_2.xlsx, name_3.xlsx, ...) or a new sheet (`rollover="sheet"`) after
+    `max_rows` rows or roughly `max_bytes` characters of cell text. With
+    workbook rollover, every finished workbook is already saved on disk if
+    the run dies part-way.
+    """
+
+    def __init__(self, output_path, part_columns=DEFAULT_PART_COLUMNS, max_rows=None, max_bytes=None,
+                 rollover="workbook"):
+        if rollover not in ("workbook", "sheet"):
+            raise ValueError(f"rollover must be 'workbook' or 'sheet', not {rollover!r}")
+        self.output_path = output_path
+        self.part_columns = max(1, part_columns)
+        self.max_rows = min(max_rows or EXCEL_MAX_ROWS, EXCEL_MAX_ROWS)
+        self.max_bytes = max_bytes
+        self.rollover = rollover
+        self.paths = []
+        self.rows_written = 0
+        self._wb = None
+        self._ws = None
+        self._sheet_no = 0
+        self._sheet_rows = 0
+        self._sheet_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _header(self):
+        return ROW_COLUMNS + [f"{PART_PREFIX}{i}" for i in range(1, self.part_columns + 1)]
+
+    def _next_path(self):
+        if not self.paths:
+            return self.output_path
+        stem, ext = os.path.splitext(self.output_path)
+        return f"{stem}_{len(self.paths) + 1}{ext}"
+
+    def _new_sheet(self):
+        if self._wb is None or self.rollover == "workbook":
+            self._save()
+            from openpyxl import Workbook
+            self._wb = Workbook(write_only=True)
+            self.paths.append(self._next_path())
+            self._sheet_no = 0
+        self._sheet_no += 1
+        self._ws = self._wb.create_sheet(f"Sheet{self._sheet_no}")
+        self._ws.append(self._header())
+        self._sheet_rows = 0
+        self._sheet_bytes = 0
+
+    def _save(self):
+        if self._wb is not None:
+            self._wb.save(self.paths[-1])
+            self._wb = self._ws = None
+
+    def write(self, row):
+        size = sum(len(v) for v in row.values() if isinstance(v, str))
+        parts = part_count(row)
+        full = (
+            self._sheet_rows >= self.max_rows
+            or (self.max_bytes and self._sheet_rows and self._sheet_bytes + size > self.max_bytes)
+        )
+        if parts > self.part_columns:
+            print(f"warning: row has {parts} {PART_PREFIX} columns, more than the "
+                  f"{self.part_columns} declared; starting a new "
+                  f"{self.rollover} (raise the part columns to avoid this)", file=sys.stderr)
+            self.part_columns = parts
+            full = True
+        if self._ws is None or full:
+            self._new_sheet()
+        self._ws.append([row.get(col, "") for col in self._header()])
+        self._sheet_rows += 1
+        self._sheet_bytes += size
+        self.rows_written += 1
+
+    def close(self):
+        """Save the open workbook (an empty run still gets a header-only file)."""
+        if self._ws is None and not self.paths:
+            self._new_sheet()
+        self._save()
+
+# ------------------- Line and Columnar Sinks -------------------
+# These keep every ROW_COLUMNS field whole (the full "Discription" HTML included)
+# and drop the Discription_Part columns, which only exist for Excel's cell limit.
+
+PRICE_COLUMNS = ("Single Price", "Corporate Price", "Enterprise Price")
+
+class JsonLinesSink:
+    """One JSON object per row; `output_path` "-" writes to stdout."""
+
+    def __init__(self, output_path="-"):
+        self.output_path = output_path
+        if output_path == "-":
+            self.paths = ["<stdout>"]
+            self._file = sys.stdout
+        else:
+            self.paths = [output_path]
+            self._file = open(output_path, "w", encoding="utf-8")
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, row):
+        self._file.write(json.dumps({c: row.get(c, "") for c in ROW_COLUMNS}, ensure_ascii=False) + "\n")
+        self.rows_written += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file is sys.stdout:
+            self._file.flush()
+        elif not self._file.closed:
+            self._file.close()
+
+class CsvSink:
+    """RFC 4180 CSV with a ROW_COLUMNS header; fields with HTML or newlines are quoted."""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.paths = [output_path]
+        self._file = open(output_path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, ROW_COLUMNS, extrasaction="ignore")
+        self._writer.writeheader()
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, row):
+        self._writer.writerow(row)
+        self.rows_written += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+class ParquetSink:
+    """Parquet file written one row group at a time (needs pyarrow).
+
+    Rows are buffered until `row_group_size` have arrived, then written out
+    as a row group, so memory holds at most one group however long the run.
+    Price columns are int64, everything else string.
+    """
+
+    def __init__(self, output_path, row_group_size=1000):
+        import pyarrow as pa
+
+        self.output_path = output_path
+        self.paths = [output_path]
+        self.row_group_size = max(1, row_group_size)
+        self.schema = pa.schema([
+            (c, pa.int64() if c in PRICE_COLUMNS else pa.string()) for c in ROW_COLUMNS
+        ])
+        self.rows_written = 0
+        self._buffer = {c: [] for c in ROW_COLUMNS}
+        self._buffered = 0
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, row):
+        for c in ROW_COLUMNS:
+            value = row.get(c)
+            if c in PRICE_COLUMNS:
+                self._buffer[c].append(int(value) if value not in (None, "") else None)
+            else:
+                self._buffer[c].append("" if value is None else str(value))
+        self._buffered += 1
+        self.rows_written += 1
+        if self._buffered >= self.row_group_size:
+            self._write_group()
+
+    def _write_group(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.output_path, self.schema)
+        if self._buffered:
+            self._writer.write_table(pa.Table.from_pydict(self._buffer, schema=self.schema))
+            self._buffer = {c: [] for c in ROW_COLUMNS}
+            self._buffered = 0
+
+    def close(self):
+        """Write the last row group (an empty run still gets a schema-only file)."""
+        if self._writer is None or self._buffered:
+            self._write_group()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+class MultiSink:
+    """Fan every row out to several sinks, so one extraction feeds all outputs."""
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    @property
+    def paths(self):
+        return [p for s in self.sinks for p in s.paths]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, row):
+        for s in self.sinks:
+            s.write(row)
+
+    def flush(self):
+        for s in self.sinks:
+            if hasattr(s, "flush"):
+                s.flush()
+
+    def close(self):
+        errors = []
+        for s in self.sinks:
+            try:
+                s.close()
+            except Exception as e:  # close the rest before reporting
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+SINKS = {
+    ".xlsx": ExcelSink,
+    ".jsonl": JsonLinesSink,
+    ".ndjson": JsonLinesSink,
+    ".csv": CsvSink,
+    ".parquet": ParquetSink,
+}
+
+def open_sink(output_path, max_rows=None, row_group_size=1000,
+              part_columns=DEFAULT_PART_COLUMNS):
+    """Sink for an output path chosen by its extension; "-" is JSON lines on stdout."""
+    if output_path == "-":
+        return JsonLinesSink("-")
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext not in SINKS:
+        raise ValueError(f"unknown output format {ext or output_path!r}, expected - or one of "
+                         + ", ".join(SINKS))
+    if ext == ".xlsx":
+        return ExcelSink(output_path, part_columns, max_rows=max_rows)
+    if ext == ".parquet":
+        return ParquetSink(output_path, row_group_size)
+    return SINKS[ext](output_path)
+
+def open_sinks(output_paths, max_rows=None, row_group_size=1000,
+               part_columns=DEFAULT_PART_COLUMNS):
+    """One sink, or a MultiSink when several outputs are requested."""
+    sinks = []
+    try:
+        for path in output_paths:
+            sinks.append(open_sink(path, max_rows, row_group_size, part_columns))
+    except Exception:
+        for s in sinks:
+            s.close()
+        raise
+    return sinks[0] if len(sinks) == 1 else MultiSink(sinks)
@@ -0,0 +1,85 @@
+import re
+from functools import lru_cache
+
+# ------------------- Text Normalization -------------------
+# One canonical emoji set and precompiled patterns shared by every extractor.
+# Headings and boilerplate lines repeat across thousands of templated reports,
+# so their cleaned forms are memoized in a bounded LRU; long body paragraphs are
+# almost always unique and skip the memo.
+
+EMOJI_RANGES = [
+    ("\U0001F600", "\U0001F64F"),  # emoticons
+    ("\U0001F300", "\U0001F5FF"),  # symbols & pictographs
+    ("\U0001F680", "\U0001F6FF"),  # transport & map
+    ("\U0001F700", "\U0001F77F"),  # alchemical
+    ("\U0001F780", "\U0001F7FF"),  # geometric
+    ("\U0001F800", "\U0001F8FF"),  # arrows
+    ("\U0001F900", "\U0001F9FF"),  # supplemental
+    ("\U0001FA00", "\U0001FAFF"),  # chess, symbols
+    ("\U00002600", "\U000026FF"),  # misc symbols
+    ("\U00002700", "\U000027BF"),  # dingbats
+    ("\U00002B00", "\U00002BFF"),  # arrows & symbols
+    ("\U0001F1E0", "\U0001F1FF"),  # flags
+]
+EMOJI_RE = re.compile("[" + "".join(f"{lo}-{hi}" for lo, hi in EMOJI_RANGES) + "]+")
+
+WHITESPACE_RE = re.compile(r"\s+")
+LEADING_SYMBOLS_RE = re.compile(r"^[^\w]+")
+SECTION_PREFIX_RE = re.compile(r"(?i)section\s*\d+[:\-]?\s*")
+NUMBER_PREFIX_RE = re.compile(r"^\d+[\.\-\)]\s*")
+
+MEMO_SIZE = 4096      # distinct strings kept per memoized function
+MEMO_MAX_LEN = 200    # longer strings are body text, not worth remembering
+
+def remove_emojis(text: str) -> str:
+    """Universal emoji remover."""
+    if not text or text.isascii():
+        return text or ""
+    return EMOJI_RE.sub("", text)
+
+def norm(s: str) -> str:
+    """Emoji-free text with runs of whitespace collapsed to one space."""
+    s = remove_emojis(s or "")
+    return WHITESPACE_RE.sub(" ", s.strip())
+
+def _clean_heading(text):
+    text = remove_emojis(text.strip())
+    text = LEADING_SYMBOLS_RE.sub("", text)
+    text = SECTION_PREFIX_RE.sub("", text)
+    text = NUMBER_PREFIX_RE.sub("", text)
+    text = WHITESPACE_RE.sub(" ", text)
+    return text.lower().strip()
+
+_clean_heading_memo = lru_cache(maxsize=MEMO_SIZE)(_clean_heading)
+
+def clean_heading(text: str) -> str:
+    """Lower-cased heading text without emojis, leading symbols or "Section N:"/"1." prefixes."""
+    if len(text) <= MEMO_MAX_LEN:
+        return _clean_heading_memo(text)
+    return _clean_heading(text)
+
+# ------------------- Batch API -------------------
+NORMALIZERS = {
+    "emoji": remove_emojis,
+    "norm": norm,
+    "heading": clean_heading,
+}
+
+def normalize_batch(texts, mode="emoji"):
+    """Normalize a list of strings in one call ("emoji", "norm" or "heading").
+
+    Emoji removal runs a single regex pass over the joined batch rather
+    than one call per string.
+    """
+    texts = [t or "" for t in texts]
+    if mode == "emoji" and not any("\x00" in t for t in texts):
+        return EMOJI_RE.sub("", "\x00".join(texts)).split("\x00") if texts else []
+    try:
+        fn = NORMALIZERS[mode]
+    except KeyError:
+        raise ValueError(f"unknown mode {mode!r}, expected one of {tuple(NORMALIZERS)}") from None
+    return [fn(t) for t in texts]
+
+def memo_info():
+    """Hit/miss statistics of the heading memo."""
+    return _clean_heading_memo.cache_info()
@@ -0,0 +1,192 @@
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from batch import list_docx_files, process_content, process_file, start_pool, warm_up
+from Extractor import RunConfig, build_row
+
+# ------------------- Folder Watcher -------------------
+# Polling keeps this dependency-free and works the same on network shares,
+# where inotify-style events are unreliable. A file is handed out once its size
+# and mtime have held still for `settle` seconds (which also debounces editors
+# that save in bursts) and it reads as a complete zip package, so half-copied
+# files are left for a later poll. A settled file that still is not a zip after
+# `max_checks` polls is handed out anyway, so it fails and is reported like any
+# other bad file instead of staying pending forever.
+
+def _signature(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+def _complete(path):
+    """True when the package's central directory is readable (the copy has finished)."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            zf.getinfo("[Content_Types].xml")
+        return True
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return False
+
+class FolderWatcher:
+    """Report .docx files in a folder that are new or modified since they were last reported."""
+
+    def __init__(self, folder, settle=2.0, include=None, exclude=None, skip_existing=False,
+                 max_checks=5):
+        self.folder = folder
+        self.settle = settle
+        self.include = include
+        self.exclude = exclude
+        self.max_checks = max_checks
+        self._done = {}     # filename -> signature last handed out
+        self._pending = {}  # filename -> (signature, first seen with it, failed zip checks)
+        if skip_existing:
+            for f in list_docx_files(folder, include, exclude):
+                self._done[f] = _signature(os.path.join(folder, f))
+
+    @property
+    def pending(self):
+        """Files seen changing that are not ready yet."""
+        return list(self._pending)
+
+    def poll(self, now=None):
+        """Paths that are ready to process, sorted by filename."""
+        now = time.monotonic() if now is None else now
+        ready = []
+        for f in list_docx_files(self.folder, self.include, self.exclude):
+            path = os.path.join(self.folder, f)
+            try:
+                sig = _signature(path)
+            except FileNotFoundError:
+                continue  # removed between listing and stat
+            if self._done.get(f) == sig:
+                self._pending.pop(f, None)
+                continue
+            seen = self._pending.get(f)
+            if seen is None or seen[0] != sig:
+                self._pending[f] = (sig, now, 0)  # new or still changing: restart the clock
+                continue
+            if now - seen[1] < self.settle:
+                continue
+            if not _complete(path) and seen[2] + 1 < self.max_checks:
+                self._pending[f] = (sig, seen[1], seen[2] + 1)
+                continue
+            del self._pending[f]
+            self._done[f] = sig
+            ready.append(path)
+        return ready
+
+# ------------------- Watch Loop -------------------
+def watch(folder, sink, workers=None, backend=None, cache=None, interval=1.0, settle=2.0,
+          include=None, exclude=None, skip_existing=False, log=print, stop=None, idle_exit=None):
+    """Extract files as they appear in folder, appending rows to sink as they finish.
+
+    Runs until `stop` (a threading.Event) is set, KeyboardInterrupt, or, with
+    `idle_exit` seconds, once nothing has been pending or running for that
+    long. Workers are started and warmed up front so the first file pays no
+    import cost. A modified file is extracted again and its new row appended.
+    With a cache.ExtractionCache, files whose contents were seen before are
+    not parsed again. If a worker dies, the documents in flight are reported
+    as failed and the pool is restarted. Returns (rows written, errors).
+    """
+    from cache import file_digest
+
+    watcher = FolderWatcher(folder, settle, include, exclude, skip_existing)
+    written, errors = 0, []
+    running = {}  # future -> (filename, digest, RunConfig)
+    idle_since = time.monotonic()
+    workers = workers or os.cpu_count() or 1
+    pool = start_pool(workers, backend)
+
+    def failed(file, err):
+        log(f"Failed: {file}: {err}")
+        errors.append((file, err))
+
+    def restart(reason):
+        # a dead worker breaks the whole pool: fail what was on it and start afresh
+        nonlocal pool
+        for file, _, _ in running.values():
+            failed(file, reason)
+        running.clear()
+        pool.shutdown(wait=False, cancel_futures=True)
+        pool = start_pool(workers, backend)
+        warm_up(pool, workers)
+        log(f"A worker died ({reason}); restarted the pool")
+
+    def submit(fn, *args):
+        try:
+            return pool.submit(fn, *args)
+        except BrokenProcessPool as e:  # a worker died while idle
+            restart(f"WorkerCrashed: {e}")
+            return pool.submit(fn, *args)
+
+    try:
+        warm_up(pool, workers)
+        log(f"Watching {folder} with {workers} worker(s)")
+        try:
+            while not (stop is not None and stop.is_set()):
+                before = written
+                ready = watcher.poll()
+                if ready:
+                    config = RunConfig()  # a long-running watch follows the calendar
+                for path in ready:
+                    file = os.path.basename(path)
+                    if cache is None:
+                        running[submit(process_file, path, backend, config)] = (file, None, config)
+                        continue
+                    try:
+                        digest = file_digest(path)
+                    except OSError as e:  # e.g. deleted or locked since the poll
+                        failed(file, f"{type(e).__name__}: {e}")
+                        continue
+                    content = cache.get(digest)
+                    if content is None:
+                        running[submit(process_content, path, backend)] = (file, digest, config)
+                        continue
+                    sink.write(build_row(content, file, config))
+                    written += 1
+                    log(f"Processing: {file}")
+
+                if running:
+                    done, _ = wait(running, timeout=interval, return_when=FIRST_COMPLETED)
+                else:
+                    done = ()
+                    if stop is not None:
+                        stop.wait(interval)
+                    else:
+                        time.sleep(interval)
+                broken = None
+                for future in done:
+                    file, digest, row_config = running.pop(future)
+                    try:
+                        result, err = future.result()
+                    except BrokenProcessPool as e:
+                        broken = f"WorkerCrashed: {e}"
+                        failed(file, broken)
+                        continue
+                    if err is not None:
+                        failed(file, err)
+                        continue
+                    if digest is not None:
+                        cache.put(digest, result)
+                        result = build_row(result, file, row_config)
+                    sink.write(result)
+                    written += 1
+                    log(f"Processing: {file}")
+                if broken is not None:
+                    restart(broken)
+                if written != before and hasattr(sink, "flush"):
+                    sink.flush()
+
+                if running or watcher.pending:
+                    idle_since = time.monotonic()
+                elif idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                    break
+        except KeyboardInterrupt:
+            log("Stopping watch")
+            for future in running:
+                future.cancel()
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return written, errors